@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Head-mirroring throughput/latency with and without the FaceMesh worker
+process, while a transcription-like load runs in the same process.
+
+    python -m benchmarks.mirror_benchmark --image face.jpg
+    python -m benchmarks.mirror_benchmark --camera 0 --load whisper
+"""
+
+import argparse
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from core.empathetic_reachy import config
+from core.empathetic_reachy.head_mirroring import HeadMirroringController
+
+
+class _NullRobot:
+    def goto_target(self, *args, **kwargs):
+        pass
+
+
+def _python_load(stop: threading.Event):
+    """Pure-Python work that holds the GIL, like Whisper result handling."""
+    while not stop.is_set():
+        sum(i * i for i in range(20000))
+
+
+def _whisper_load(stop: threading.Event):
+    from faster_whisper import WhisperModel
+    model = WhisperModel(config.WHISPER_MODEL, device="cpu", compute_type="int8")
+    audio = (np.random.randn(config.AUDIO_SAMPLE_RATE * 5) * 0.1).astype(np.float32)
+    while not stop.is_set():
+        segments, _ = model.transcribe(audio, language="en")
+        list(segments)
+
+
+def _frames(args):
+    if args.image:
+        frame = cv2.resize(cv2.imread(args.image), (480, 360))
+        while True:
+            yield frame
+    cap = cv2.VideoCapture(args.camera)
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 480)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 360)
+    try:
+        while True:
+            ok, frame = cap.read()
+            if ok:
+                yield frame
+    finally:
+        cap.release()
+
+
+def run(use_process: bool, args) -> dict:
+    controller = HeadMirroringController(_NullRobot(), use_process=use_process)
+    stop = threading.Event()
+    loads = {"python": _python_load, "whisper": _whisper_load}
+    load_threads = [threading.Thread(target=loads[args.load], args=(stop,), daemon=True)
+                    for _ in range(args.load_threads)] if args.load != "none" else []
+    for t in load_threads: t.start()
+
+    frames = _frames(args)
+    intervals, latencies = [], []
+    controller.process_frame(cv2.cvtColor(next(frames), cv2.COLOR_BGR2RGB))  # Warm-up / spawn
+    if controller.worker:
+        # Keep worker spawn + FaceMesh start-up out of the timed window
+        deadline = time.perf_counter() + 60.0
+        results = []
+        while not results:
+            if time.perf_counter() > deadline:
+                raise RuntimeError("FaceMesh worker produced no result")
+            results = controller.worker.poll(timeout=0.5)
+        for result in results:
+            controller._handle_result(result)
+    original_apply = controller._apply_pose
+
+    def counting_apply(pose, features=None):
+        latencies.append(controller.pose_latency)
+        original_apply(pose, features)
+    controller._apply_pose = counting_apply
+
+    start = last = time.perf_counter()
+    while time.perf_counter() - start < args.seconds:
+        image_rgb = cv2.cvtColor(cv2.flip(next(frames), 1), cv2.COLOR_BGR2RGB)
+        controller.process_frame(image_rgb)
+        now = time.perf_counter()
+        intervals.append(now - last)
+        last = now
+    elapsed = time.perf_counter() - start
+    stop.set()
+    controller.release()
+
+    intervals_ms = np.array(intervals) * 1000
+    latencies_ms = np.array(latencies or [np.nan]) * 1000
+    return {
+        "mode": "process" if use_process else "in-process",
+        "loop_fps": len(intervals) / elapsed,
+        "pose_fps": len(latencies) / elapsed,
+        "jitter_ms": float(np.std(intervals_ms)),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--image", help="Still image with a face (default: use camera)")
+    parser.add_argument("--camera", type=int, default=0)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--load", choices=["none", "python", "whisper"], default="python")
+    parser.add_argument("--load-threads", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"load: {args.load} x{args.load_threads}, {args.seconds:.0f}s per mode")
+    print(f"{'mode':<12}{'loop fps':>10}{'pose fps':>10}{'jitter ms':>11}{'lat p50':>9}{'lat p95':>9}")
+    for use_process in (False, True):
+        r = run(use_process, args)
+        print(f"{r['mode']:<12}{r['loop_fps']:>10.1f}{r['pose_fps']:>10.1f}"
+              f"{r['jitter_ms']:>11.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
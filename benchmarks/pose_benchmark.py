@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Per-tick cost of building head/antenna targets in the animation, mirroring
+and gesture loops: reachy_mini's create_head_pose versus the pose cache.
+
+    python -m benchmarks.pose_benchmark --ticks 20000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from reachy_mini.utils import create_head_pose
+
+from core.empathetic_reachy.pose_cache import cached_antennas, cached_head_pose, head_pose
+from core.empathetic_reachy.voice_animator import VoiceAnimator
+
+TICK = 0.1  # Default animation tick
+SPEECH_SECONDS = 5.0
+
+
+def _per_tick_us(fn, ticks: int) -> float:
+    start = time.perf_counter()
+    fn(ticks)
+    return (time.perf_counter() - start) / ticks * 1e6
+
+
+def animation_baseline(ticks):
+    for k in range(ticks):
+        t = k * 1.8 * TICK
+        create_head_pose(0, 0, 0, np.sin(t * 0.7) * 1.5, np.sin(t * 1.4) * 2, np.sin(t * 1.0) * 4,
+                         mm=True, degrees=True)
+        np.deg2rad([18 + np.sin(t * 1.8) * 12, 18 - np.sin(t * 1.8) * 12])
+
+
+def animation_vectorized(ticks):
+    steps = int(SPEECH_SECONDS / TICK)  # One trajectory per utterance
+    for k in range(0, ticks, steps):
+        poses, antennas = VoiceAnimator.trajectory(k * 1.8 * TICK, TICK, steps)
+        for i in range(steps):
+            _ = poses[i], antennas[i]
+
+
+def _mirror_angles(ticks):
+    rng = np.random.default_rng(0)
+    return rng.uniform([-30, -20, -40], [30, 20, 40], size=(ticks, 3)).tolist()
+
+
+def mirror_baseline(ticks, angles=None):
+    for roll, pitch, yaw in angles or _mirror_angles(ticks):
+        create_head_pose(0, 0, 0, roll, pitch, yaw, mm=True, degrees=True)
+
+
+def mirror_fast(ticks, angles=None):
+    for roll, pitch, yaw in angles or _mirror_angles(ticks):
+        head_pose(roll, pitch, yaw)
+
+
+# (yaw, pitch, roll, ant_l, ant_r) keyframes from GestureController
+KEYFRAMES = [(0, 0, 0, 0, 0), (0, -8, 0, 25, 25), (12, -12, 8, 40, -15), (0, 12, 0, 8, 8),
+             (18, 0, 0, -8, -8), (0, -4, 0, 40, 40), (0, 15, 0, -25, -25), (0, 0, 15, -5, 35)]
+
+
+def gesture_baseline(ticks):
+    for k in range(ticks):
+        yaw, pitch, roll, ant_l, ant_r = KEYFRAMES[k % len(KEYFRAMES)]
+        create_head_pose(0, 0, 0, roll, pitch, yaw, mm=True, degrees=True)
+        np.deg2rad([ant_l, ant_r])
+
+
+def gesture_cached(ticks):
+    for k in range(ticks):
+        yaw, pitch, roll, ant_l, ant_r = KEYFRAMES[k % len(KEYFRAMES)]
+        cached_head_pose(roll, pitch, yaw)
+        cached_antennas(ant_l, ant_r)
+
+
+def max_error() -> float:
+    """Largest element difference from create_head_pose over random poses."""
+    worst = 0.0
+    for roll, pitch, yaw in _mirror_angles(500):
+        expected = create_head_pose(0, 0, 0, roll, pitch, yaw, mm=True, degrees=True)
+        worst = max(worst, float(np.abs(head_pose(roll, pitch, yaw) - expected).max()))
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ticks", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"max |head_pose - create_head_pose|: {max_error():.2e}")
+    angles = _mirror_angles(args.ticks)
+    rows = [
+        ("animation", animation_baseline, animation_vectorized),
+        ("mirroring", lambda n: mirror_baseline(n, angles), lambda n: mirror_fast(n, angles)),
+        ("gesture", gesture_baseline, gesture_cached),
+    ]
+    print(f"{'loop':<12}{'before us':>11}{'after us':>10}{'speedup':>9}")
+    for name, before, after in rows:
+        b, a = _per_tick_us(before, args.ticks), _per_tick_us(after, args.ticks)
+        print(f"{name:<12}{b:>11.1f}{a:>10.1f}{b / a:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
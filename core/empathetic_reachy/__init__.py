@@ -1,16 +1,30 @@
 __version__ = "1.0.0"
 
+import importlib
+
 from . import config
-from .conversation_manager import ConversationManager
-from .emotion_analyzer import EmotionAnalyzer
-from .gesture_controller import GestureController
-from .head_mirroring import HeadMirroringController
-from .voice_animator import VoiceAnimator
+
+# Imported on first access, so spawned workers (FaceMesh, STT service) that
+# only need one submodule don't load Whisper, sounddevice and anthropic
+_LAZY = {
+    "ConversationManager": ".conversation_manager",
+    "EmotionAnalyzer": ".emotion_analyzer",
+    "GestureController": ".gesture_controller",
+    "HeadMirroringController": ".head_mirroring",
+    "VoiceAnimator": ".voice_animator",
+}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        return getattr(importlib.import_module(_LAZY[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     "config",
     "ConversationManager",
-    "EmotionAnalyzer", 
+    "EmotionAnalyzer",
     "GestureController",
     "HeadMirroringController",
     "VoiceAnimator",
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Offline batch evaluation of the STT -> emotion -> gesture path.
+
+Streams a directory of recorded utterances (audio) or transcripts (.txt)
+through the same Whisper transcription, per-sentence emotion timeline and
+gesture cues used in a live turn, one warm model per worker process.
+
+    python -m core.empathetic_reachy.batch_eval recordings/ -o results.csv
+    python -m core.empathetic_reachy.batch_eval recordings/ -o results.parquet \\
+        --model small --beam-size 1 --workers 8 --keyword-map keywords.json
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from . import config
+from .emotion_analyzer import EmotionAnalyzer
+
+logger = logging.getLogger("BatchEval")
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".flac", ".ogg", ".m4a", ".webm"}
+TRANSCRIPT_EXTENSIONS = {".txt"}
+
+# Per-worker state, created once by _init_worker
+_whisper = None
+_analyzer: Optional[EmotionAnalyzer] = None
+_options: Dict = {}
+
+
+def _init_worker(options: Dict) -> None:
+    """Load one Whisper model and analyzer per worker process."""
+    global _whisper, _analyzer, _options
+    logging.getLogger("EmotionAnalyzer").setLevel(logging.WARNING)
+    _options = options
+    if options["keyword_map"]:
+        EmotionAnalyzer.KEYWORD_MAP = options["keyword_map"]
+    _analyzer = EmotionAnalyzer(simulation_mode=True)
+    if options["needs_stt"]:
+        from faster_whisper import WhisperModel
+        _whisper = WhisperModel(options["model"], device="cpu", compute_type="int8",
+                                cpu_threads=options["cpu_threads"])
+
+
+def _voice_activity(samples: np.ndarray, threshold: float) -> Dict:
+    """Same RMS gate as ConversationManager.capture_utterance, for threshold tuning."""
+    n_chunks = len(samples) // config.LISTEN_CHUNK_SIZE
+    if n_chunks == 0:
+        return {"max_rms": 0.0, "voiced_ratio": 0.0, "has_voice": False}
+    chunks = samples[:n_chunks * config.LISTEN_CHUNK_SIZE].reshape(n_chunks, config.LISTEN_CHUNK_SIZE)
+    rms = np.sqrt(np.mean(chunks ** 2, axis=1))
+    voiced = rms > threshold
+    return {"max_rms": float(rms.max()), "voiced_ratio": float(voiced.mean()),
+            "has_voice": bool(voiced.any())}
+
+
+def _evaluate_file(path: str) -> Dict:
+    """Run a single file through STT (if audio) and the live emotion timeline / gesture cues."""
+    row = {"file": path, "transcript": "", "emotion": "", "cues": "", "gestures": "",
+           "audio_seconds": 0.0, "stt_seconds": 0.0, "emotion_seconds": 0.0,
+           "rtf": 0.0, "max_rms": 0.0, "voiced_ratio": 0.0, "has_voice": True, "error": ""}
+    try:
+        if Path(path).suffix.lower() in TRANSCRIPT_EXTENSIONS:
+            text = Path(path).read_text(encoding="utf-8").strip()
+        else:
+            from faster_whisper import decode_audio
+            samples = decode_audio(path, sampling_rate=config.AUDIO_SAMPLE_RATE)
+            row["audio_seconds"] = len(samples) / config.AUDIO_SAMPLE_RATE
+            row.update(_voice_activity(samples, _options["vad_threshold"]))
+
+            start = time.perf_counter()
+            segments, _ = _whisper.transcribe(
+                samples, language="en", beam_size=_options["beam_size"],
+                vad_filter=_options["vad_filter"])
+            text = " ".join([s.text for s in segments]).strip()
+            row["stt_seconds"] = time.perf_counter() - start
+            if row["audio_seconds"]:
+                row["rtf"] = row["stt_seconds"] / row["audio_seconds"]
+
+        row["transcript"] = text
+        if text:
+            start = time.perf_counter()
+            # As ConversationManager.annotate_reply / dispatch_cues do for a reply
+            cues = _analyzer.analyze_timeline(text)
+            row["emotion_seconds"] = time.perf_counter() - start
+            row["emotion"] = _analyzer.dominant_emotion(cues)
+            row["cues"] = json.dumps([[round(offset, 3), emotion] for offset, emotion in cues])
+            row["gestures"] = " ".join(emotion for _, emotion in cues)
+    except Exception as e:
+        row["error"] = str(e)
+    return row
+
+
+def iter_corpus(root: Path) -> Iterator[str]:
+    """Yield audio and transcript files under root in a stable order."""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if Path(name).suffix.lower() in AUDIO_EXTENSIONS | TRANSCRIPT_EXTENSIONS:
+                yield os.path.join(dirpath, name)
+
+
+def summarize(rows: List[Dict], wall_seconds: float, workers: int) -> Dict:
+    """Aggregate throughput for a finished run."""
+    audio = sum(r["audio_seconds"] for r in rows)
+    stt = sum(r["stt_seconds"] for r in rows)
+    emotions: Dict[str, int] = {}
+    for r in rows:
+        if r["emotion"]:
+            emotions[r["emotion"]] = emotions.get(r["emotion"], 0) + 1
+    return {
+        "items": len(rows),
+        "errors": sum(1 for r in rows if r["error"]),
+        "workers": workers,
+        "wall_seconds": wall_seconds,
+        "items_per_second": len(rows) / wall_seconds if wall_seconds else 0.0,
+        "audio_seconds": audio,
+        "audio_seconds_per_wall_second": audio / wall_seconds if wall_seconds else 0.0,
+        "mean_rtf": stt / audio if audio else 0.0,
+        "emotion_counts": json.dumps(emotions, sort_keys=True),
+    }
+
+
+def write_table(rows: List[Dict], path: Path) -> None:
+    """Write rows as Parquet (needs pandas + pyarrow) or CSV, by extension."""
+    if not rows:
+        return
+    if path.suffix.lower() == ".parquet":
+        import pandas as pd  # type: ignore
+        pd.DataFrame(rows).to_parquet(path, index=False)
+        return
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def check_output(path: Path) -> Path:
+    """Fail over from Parquet to CSV up front, not after the corpus has been processed."""
+    if path.suffix.lower() != ".parquet":
+        return path
+    try:
+        import pandas  # type: ignore  # noqa: F401
+        import pyarrow  # type: ignore  # noqa: F401
+    except ImportError:
+        logger.warning("⚠️ Parquet needs pandas + pyarrow; writing CSV instead")
+        return path.with_suffix(".csv")
+    return path
+
+
+def run(paths: List[str], options: Dict, workers: int) -> List[Dict]:
+    """Evaluate paths across a process pool, preserving input order."""
+    options = dict(options, needs_stt=any(
+        Path(p).suffix.lower() in AUDIO_EXTENSIONS for p in paths))
+    chunksize = max(1, len(paths) // (workers * 8))
+    rows = []
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(options,)) as pool:
+        for i, row in enumerate(pool.map(_evaluate_file, paths, chunksize=chunksize), 1):
+            rows.append(row)
+            if i % 100 == 0:
+                logger.info(f"📊 {i}/{len(paths)}")
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Batch-evaluate STT -> emotion -> gesture over a corpus.")
+    parser.add_argument("corpus", type=Path, help="Directory of audio and/or .txt transcript files")
+    parser.add_argument("-o", "--output", type=Path, default=Path("batch_eval.csv"),
+                        help="Per-item results (.csv or .parquet); summary goes next to it")
+    parser.add_argument("--model", default=config.WHISPER_MODEL, help="Whisper model size")
+    parser.add_argument("--beam-size", type=int, default=5)
+    parser.add_argument("--vad-filter", action="store_true", help="Enable faster-whisper Silero VAD")
+    parser.add_argument("--vad-threshold", type=float, default=config.SILENCE_THRESHOLD,
+                        help="RMS threshold to test (default: config.SILENCE_THRESHOLD, the live gate)")
+    parser.add_argument("--keyword-map", type=Path, help="JSON {regex: emotion} replacing KEYWORD_MAP")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--cpu-threads", type=int, default=1, help="CTranslate2 threads per worker")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    args.output = check_output(args.output)
+    paths = list(iter_corpus(args.corpus))
+    if not paths:
+        parser.error(f"No audio or transcript files found in {args.corpus}")
+
+    options = {
+        "model": args.model,
+        "beam_size": args.beam_size,
+        "vad_filter": args.vad_filter,
+        "vad_threshold": args.vad_threshold,
+        "keyword_map": json.loads(args.keyword_map.read_text()) if args.keyword_map else None,
+        "cpu_threads": args.cpu_threads,
+    }
+    logger.info(f"🚀 {len(paths)} files, {args.workers} workers, Whisper {args.model}")
+    start = time.perf_counter()
+    rows = run(paths, options, args.workers)
+    summary = summarize(rows, time.perf_counter() - start, args.workers)
+
+    write_table(rows, args.output)
+    summary_path = args.output.with_name(f"{args.output.stem}_summary{args.output.suffix}")
+    write_table([summary], summary_path)
+    logger.info(f"✅ {summary['items']} items in {summary['wall_seconds']:.1f}s "
+                f"({summary['items_per_second']:.1f}/s, RTF {summary['mean_rtf']:.3f}) "
+                f"-> {args.output}, {summary_path}")
+
+
+if __name__ == "__main__":
+    main()
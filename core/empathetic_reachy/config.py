@@ -18,14 +18,105 @@ STT_ENGINE = "whisper"  # Speech-to-Text: Whisper (local, free)
 TTS_ENGINE = "gtts"  # Text-to-Speech: gTTS (free, no API needed)
 WHISPER_MODEL = "base"
 AUDIO_SAMPLE_RATE = 16000
-SILENCE_THRESHOLD = 0.01
-SILENCE_DURATION = 1.5
+# Live speech gate (also the batch_eval --vad-threshold default)
+SILENCE_THRESHOLD = 0.001  # Chunk RMS above this counts as voice
+SILENCE_DURATION = 2.5  # Seconds of silence that end an utterance
+LISTEN_CHUNK_SIZE = 2048  # Samples per gate decision
 AUDIO_INPUT_DEVICE = None  # None = system default, or set device index/name
 AUDIO_BUFFER_SIZE = 2048  # Larger = smoother playback (prevents stuttering)
 
+# --- STT SERVICE ---
+# Share one warm Whisper model across sessions via a local worker process
+STT_SERVICE_ENABLED = os.getenv("REACHY_STT_SERVICE", "false").lower() == "true"
+STT_SERVICE_ADDRESS = ("127.0.0.1", int(os.getenv("REACHY_STT_PORT", "6011")))
+# Required for a standalone service; when unset, the client spawns its own
+# service with a random per-session key
+STT_SERVICE_AUTHKEY = os.getenv("REACHY_STT_AUTHKEY", "").encode() or None
+STT_SERVICE_WORKERS = 2  # Concurrent transcriptions on one model copy
+STT_SERVICE_MAX_QUEUE = 8  # Pending requests before the service answers "busy"
+STT_SERVICE_AUTOSTART = True  # Spawn the service if nothing is listening
+
+# --- TURN PIPELINE ---
+# Workers per stage. Raising stt/tts above 1 lets turns overtake each other.
+# llm is always 1 (it owns the conversation history) and playback stays at 1
+# so the robot never talks over itself.
+TURN_STAGE_CONCURRENCY = {
+    "capture": 1, "stt": 1, "llm": 1, "emotion": 1,
+    "tts": 1, "playback": 1, "gesture": 1,
+}
+TURN_QUEUE_SIZE = 2  # Turns waiting between two stages before the upstream stage blocks
+
 # --- ROBOT SETTINGS ---
 MAX_CONVERSATION_HISTORY = 20
 GESTURE_DURATION = 1.5
+# Gesture / rest poses are quantized to this step and memoized
+POSE_CACHE_STEP_DEG = 0.5
+POSE_CACHE_SIZE = 512
+
+# --- HEAD MIRRORING ---
+# Run FaceMesh in a worker process (shared-memory frames) to keep it off the GIL
+MIRROR_INFERENCE_PROCESS = os.getenv("REACHY_MIRROR_PROCESS", "false").lower() == "true"
+MIRROR_RING_SLOTS = 3  # Frames in flight to the worker
+MIRROR_WORKER_MAX_RESTARTS = 3  # Worker crashes before falling back to in-process detection
+
+# --- QUALITY GOVERNOR ---
+# Trades model size / frame rate against latency targets at runtime.
+# When disabled, every domain stays at QUALITY_DEFAULT_LEVELS (the classic settings).
+QUALITY_GOVERNOR_ENABLED = os.getenv("REACHY_QUALITY_GOVERNOR", "false").lower() == "true"
+QUALITY_LEVELS = {  # Best quality first
+    "stt": [
+        {"whisper_model": "small", "beam_size": 5},
+        {"whisper_model": WHISPER_MODEL, "beam_size": 5},
+        {"whisper_model": WHISPER_MODEL, "beam_size": 1},
+        {"whisper_model": "tiny", "beam_size": 1},
+    ],
+    "vision": [  # sleep_scale multiplies each mirror loop's own per-frame sleep
+        {"camera": (640, 480), "inference_every": 1, "sleep_scale": 0.5, "refine_landmarks": True},
+        {"camera": (480, 360), "inference_every": 2, "sleep_scale": 1.0, "refine_landmarks": False},
+        {"camera": (320, 240), "inference_every": 3, "sleep_scale": 1.5, "refine_landmarks": False},
+    ],
+    "animation": [
+        {"tick": 0.05},
+        {"tick": 0.1},
+        {"tick": 0.2},
+    ],
+}
+QUALITY_DEFAULT_LEVELS = {"stt": 1, "vision": 1, "animation": 1}
+# The STT service holds one model, so in service mode stt levels only change beam size
+QUALITY_LEVELS_STT_SERVICE = [{"beam_size": 5}, {"beam_size": 2}, {"beam_size": 1}]
+QUALITY_DEFAULT_LEVEL_STT_SERVICE = 0
+QUALITY_PINNED = {}  # e.g. {"stt": 0} keeps Whisper "small" regardless of load
+LATENCY_TARGETS = {
+    "stt": 0.5,  # Real-time factor (inference seconds / audio seconds)
+    "vision": 0.05,  # Seconds from frame to pose
+    "animation": 0.02,  # Seconds an animation tick runs late
+}
+CPU_LOAD_TARGET = 0.85  # This process's CPU time per core over CPU_SAMPLE_WINDOW
+CPU_SAMPLE_WINDOW = 2.0  # Seconds
+QUALITY_EWMA_ALPHA = 0.2
+QUALITY_MIN_SAMPLES = 5  # Samples since the last switch before deciding again
+QUALITY_SWITCH_COOLDOWN = 10.0  # Seconds
+QUALITY_HEADROOM = 0.5  # Step up only below this fraction of the targets
+
+# --- USER AFFECT ---
+# Expression estimate from the FaceMesh landmarks used for mirroring (no extra model)
+USER_AFFECT_SMOOTHING = 0.3  # EWMA weight of each new frame
+USER_AFFECT_BASELINE_FRAMES = 15  # Frames after calibration taken as the neutral face
+USER_AFFECT_MIN_CONFIDENCE = 0.6  # Below this the estimate is ignored
+USER_AFFECT_MAX_AGE = 1.0  # Seconds without a face before the estimate reverts to neutral
+
+# --- UI PREVIEW ---
+# Webcam preview is pushed as JPEG only when a new frame exists
+PREVIEW_JPEG_QUALITY = 70
+PREVIEW_WIDTH = 320  # Pixels; frames are downscaled before encoding
+PREVIEW_MAX_FPS = 15
+
+# --- RESPONSE CACHE ---
+# Opt-in: reuse replies (text, emotion, speech audio) for repeated openers
+RESPONSE_CACHE_ENABLED = os.getenv("REACHY_RESPONSE_CACHE", "false").lower() == "true"
+RESPONSE_CACHE_SIZE = 256  # Max cached replies (LRU)
+RESPONSE_CACHE_TTL = 3600  # Seconds
+RESPONSE_CACHE_CONTEXT_TURNS = 2  # Prior messages included in the cache key
 
 # Safe limits for Reachy Mini
 HEAD_LIMITS = {
@@ -52,6 +143,7 @@ def print_config():
     print(f"Mode: {'SIMULATION' if SIMULATION_MODE else 'HARDWARE'}")
     print(f"Anthropic Key: {'✅ Set' if ANTHROPIC_API_KEY else '❌ Missing'}")
     print(f"Nvidia Key: {'✅ Set' if NVIDIA_API_KEY else '⚠️ Optional (Missing)'}")
-    print(f"STT Engine: {STT_ENGINE} ({WHISPER_MODEL})")
+    print(f"STT Engine: {STT_ENGINE} ({WHISPER_MODEL}{', service' if STT_SERVICE_ENABLED else ''})")
     print(f"TTS Engine: {TTS_ENGINE} (free, no API needed)")
+    print(f"Response Cache: {'✅ On' if RESPONSE_CACHE_ENABLED else 'Off'}")
     print("━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
\ No newline at end of file
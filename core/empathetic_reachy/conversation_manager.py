@@ -1,11 +1,9 @@
 import asyncio
 import io
 import logging
-import tempfile
+import threading
 import time
-import os
-import wave
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional, Tuple
 
 import anthropic
 from faster_whisper import WhisperModel
@@ -17,12 +15,18 @@ from pydub import AudioSegment
 from . import config
 from .emotion_analyzer import EmotionAnalyzer
 from .gesture_controller import GestureController
+from .quality_governor import governor
+from .response_cache import ResponseCache
+from .stt_service import STTClient
+from .turn_pipeline import Turn, TurnPipeline
 from .voice_animator import VoiceAnimator
 
 logger = logging.getLogger("ConversationManager")
 
 class ConversationManager:
     """Perfect: Normal speed voice, synchronized movements."""
+
+    FALLBACK_RESPONSE = "Having trouble thinking. Try again?"
     
     def __init__(self, reachy_mini, claude_api_key: str, nvidia_api_key: Optional[str] = None):
         self.mini = reachy_mini
@@ -30,8 +34,17 @@ class ConversationManager:
         self.gesture_controller = GestureController(reachy_mini)
         self.voice_animator = VoiceAnimator(reachy_mini)
         self.claude = anthropic.Anthropic(api_key=claude_api_key)
-        logger.info(f"Loading Whisper {config.WHISPER_MODEL}...")
-        self.whisper = WhisperModel(config.WHISPER_MODEL, device="cpu", compute_type="int8")
+        self.whisper = self.stt = self.whisper_model = None
+        self._whisper_lock = threading.Lock()
+        self._whisper_loading: Optional[str] = None  # Model being loaded in the background
+        if config.STT_SERVICE_ENABLED:
+            logger.info(f"STT service at {config.STT_SERVICE_ADDRESS}")
+            self.stt = STTClient()
+            governor.set_levels("stt", config.QUALITY_LEVELS_STT_SERVICE, config.QUALITY_DEFAULT_LEVEL_STT_SERVICE)
+        else:
+            self.whisper_model = governor.settings("stt")["whisper_model"]
+            logger.info(f"Loading Whisper {self.whisper_model}...")
+            self.whisper = WhisperModel(self.whisper_model, device="cpu", compute_type="int8")
         logger.info("✅ TTS: gTTS")
         self.history: List[Dict] = []
         self.sample_rate = config.AUDIO_SAMPLE_RATE
@@ -40,11 +53,34 @@ class ConversationManager:
             "SHORT answers (1-2 sentences). Warm, curious, helpful. "
             "NEVER describe actions. Speak naturally."
         )
+        # Set to the mirroring controller's UserAffectEstimator to react to the user's face
+        self.user_affect = None
+        self.response_cache = ResponseCache(
+            config.RESPONSE_CACHE_SIZE, config.RESPONSE_CACHE_TTL,
+            config.RESPONSE_CACHE_CONTEXT_TURNS) if config.RESPONSE_CACHE_ENABLED else None
+        self.pipeline = TurnPipeline(self)
 
     async def listen_to_user(self, timeout=15) -> Optional[str]:
-        """Ultra-sensitive speech detection."""
+        """Capture an utterance and transcribe it."""
+        pcm = await self.capture_utterance(timeout)
+        if pcm is None:
+            return None
+
+        logger.info(f"📝 Transcribing...")
+        try:
+            text = await asyncio.to_thread(self.transcribe, pcm)
+            if text:
+                logger.info(f"✅ '{text}'")
+                return text
+            return None
+        except Exception as e:
+            logger.error(f"Error: {e}")
+            return None
+
+    async def capture_utterance(self, timeout=15) -> Optional[np.ndarray]:
+        """Ultra-sensitive speech detection. Returns int16 mono PCM or None."""
         logger.info("🎤 SPEAK NOW!")
-        threshold, silence_duration, chunk_size = 0.001, 2.5, 2048
+        threshold, silence_duration, chunk_size = config.SILENCE_THRESHOLD, config.SILENCE_DURATION, config.LISTEN_CHUNK_SIZE
         frames, silent_chunks, has_voice, max_vol = [], 0, False, 0.0
         loop = asyncio.get_event_loop()
         queue = asyncio.Queue()
@@ -90,29 +126,61 @@ class ConversationManager:
         if not has_voice:
             logger.error(f"❌ NO SPEECH (max: {max_vol:.5f})")
             return None
+        return np.concatenate(frames).reshape(-1)
 
-        logger.info(f"📝 Transcribing...")
-        temp_path = tempfile.mktemp(suffix=".wav")
-        with wave.open(temp_path, 'wb') as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(self.sample_rate)
-            wf.writeframes(np.concatenate(frames).tobytes())
+    def transcribe(self, pcm: np.ndarray) -> str:
+        """int16 PCM -> text, via the STT service or the in-process model."""
+        settings = governor.settings("stt")
+        if self.stt:
+            result = self.stt.transcribe(pcm, self.sample_rate, beam_size=settings["beam_size"])
+            logger.info(f"STT RTF: {result['rtf']:.2f}")
+            governor.record("stt", result["rtf"])
+            return result["text"]
+
+        with self._whisper_lock:
+            if settings["whisper_model"] != self.whisper_model and self._whisper_loading is None:
+                self._whisper_loading = settings["whisper_model"]
+                threading.Thread(target=self._load_whisper, args=(settings["whisper_model"],),
+                                 daemon=True, name="whisper-load").start()
+            # Keep using the current model until the new one is ready
+            whisper, current = self.whisper, self.whisper_model
+        start = time.perf_counter()
+        segments, _ = whisper.transcribe(pcm.astype(np.float32) / 32768.0, language="en",
+                                         beam_size=settings["beam_size"])
+        text = " ".join([s.text for s in segments]).strip()
+        if current == settings["whisper_model"]:  # Don't judge a level by the previous model's speed
+            governor.record("stt", (time.perf_counter() - start) / (len(pcm) / self.sample_rate))
+        return text
 
+    def _load_whisper(self, name: str):
+        """Load (maybe download) a Whisper model off the turn path, then swap it in."""
+        logger.info(f"Loading Whisper {name} in the background...")
+        model = None
         try:
-            segments, _ = await asyncio.to_thread(self.whisper.transcribe, temp_path, language="en")
-            text = " ".join([s.text for s in segments]).strip()
-            if text:
-                logger.info(f"✅ '{text}'")
-                return text
-            return None
+            model = WhisperModel(name, device="cpu", compute_type="int8")
         except Exception as e:
-            logger.error(f"Error: {e}")
+            logger.error(f"Whisper {name}: {e}")
+        with self._whisper_lock:
+            if model is not None:
+                logger.info(f"✅ Switched Whisper {self.whisper_model} → {name}")
+                self.whisper, self.whisper_model = model, name
+            self._whisper_loading = None
+
+    def get_user_affect(self) -> Optional[Dict]:
+        """The user's current expression estimate, if confident enough to act on."""
+        if self.user_affect is None: return None
+        affect = self.user_affect.estimate()
+        if affect["emotion"] == "neutral" or affect["confidence"] < config.USER_AFFECT_MIN_CONFIDENCE:
             return None
-        finally:
-            if os.path.exists(temp_path): os.remove(temp_path)
+        return affect
+
+    def system_prompt(self) -> str:
+        affect = self.get_user_affect()
+        if affect is None:
+            return self.SYSTEM_PROMPT
+        return f"{self.SYSTEM_PROMPT} The user currently looks {affect['emotion']}."
 
-    async def get_claude_response(self, user_text: str) -> str:
+    async def get_claude_response(self, user_text: str, system: Optional[str] = None) -> str:
         """Query Claude."""
         messages = [{"role": m["role"], "content": m["content"]} 
                    for m in self.history[-config.MAX_CONVERSATION_HISTORY:]]
@@ -120,55 +188,129 @@ class ConversationManager:
         try:
             response = await asyncio.to_thread(
                 self.claude.messages.create, model="claude-sonnet-4-20250514",
-                max_tokens=150, system=self.SYSTEM_PROMPT, messages=messages)
+                max_tokens=150, system=system or self.system_prompt(), messages=messages)
             return response.content[0].text
         except Exception as e:
             logger.error(f"Claude: {e}")
-            return "Having trouble thinking. Try again?"
+            return self.FALLBACK_RESPONSE
+
+    async def get_response(self, user_text: str) -> Dict:
+        """Record the turn in history and get the reply text (or a whole cached reply)."""
+        key, system = None, self.system_prompt()
+        if self.response_cache:
+            key = self.response_cache.key(user_text, self.history, system)
+            cached = self.response_cache.get(key)
+            if cached:
+                logger.info(f"⚡ Cache hit (rate: {self.response_cache.hit_rate:.0%})")
+                self.history.append({"role": "user", "content": user_text})
+                self.history.append({"role": "assistant", "content": cached["response"]})
+                return cached
+
+        self.history.append({"role": "user", "content": user_text})
+        response = await self.get_claude_response(user_text, system)
+        self.history.append({"role": "assistant", "content": response})
+        if response == self.FALLBACK_RESPONSE:
+            key = None
+        return {"response": response, "emotion": None, "cues": None, "audio": None, "cache_key": key}
+
+    def annotate_reply(self, reply: Dict) -> Dict:
+        """Add emotion cues to a fresh reply and cache it; cached replies pass through."""
+        if reply["cues"] is not None:
+            return reply
+        cues = self.emotion_analyzer.analyze_timeline(reply["response"])
+        emotion = self.emotion_analyzer.dominant_emotion(cues)
+        if reply.get("cache_key"):
+            # Audio is attached to the entry once it has been synthesized
+            return self.response_cache.put(reply["cache_key"], reply["response"], emotion, cues)
+        return dict(reply, emotion=emotion, cues=cues)
 
-    async def speak_response(self, text: str) -> None:
-        """FIXED: Normal speed robotic voice, perfect sync."""
+    def synthesize_speech(self, text: str) -> Tuple[np.ndarray, int]:
+        """gTTS + robotic effects -> (float32 mono samples, frame rate)."""
+        tts = gTTS(text=text, lang="en", slow=False)
+        fp = io.BytesIO()
+        tts.write_to_fp(fp)
+        fp.seek(0)
+        audio = AudioSegment.from_file(fp, format="mp3")
+        
+        # Robotic but NORMAL SPEED
+        audio = audio._spawn(audio.raw_data, overrides={'frame_rate': int(audio.frame_rate * 0.95)})
+        audio = audio.set_frame_rate(audio.frame_rate)
+        audio = audio.compress_dynamic_range(-15, 3).high_pass_filter(250).normalize()
+        
+        samples = np.array(audio.get_array_of_samples())
+        if audio.channels == 2:
+            samples = samples.reshape((-1, 2)).mean(axis=1)
+        return samples.astype(np.float32) / 32768.0, audio.frame_rate
+
+    async def speak_response(self, text: str, audio: Optional[Tuple[np.ndarray, int]] = None,
+                             cues: Optional[List[Tuple[float, str]]] = None,
+                             on_start: Optional[Callable[[float, float], None]] = None
+                             ) -> Optional[Tuple[np.ndarray, int]]:
+        """
+        FIXED: Normal speed robotic voice, perfect sync. Gesture cues
+        (offset fraction, emotion) fire as playback reaches each sentence;
+        on_start(start, duration) is called once audio starts. Returns the
+        audio played. Cancelling stops playback immediately.
+        """
         logger.info(f"🔊 {text}")
+        gesture_task = None
         try:
-            tts = gTTS(text=text, lang="en", slow=False)
-            fp = io.BytesIO()
-            tts.write_to_fp(fp)
-            fp.seek(0)
-            audio = AudioSegment.from_file(fp, format="mp3")
-            
-            # Robotic but NORMAL SPEED
-            audio = audio._spawn(audio.raw_data, overrides={'frame_rate': int(audio.frame_rate * 0.95)})
-            audio = audio.set_frame_rate(audio.frame_rate)
-            audio = audio.compress_dynamic_range(-15, 3).high_pass_filter(250).normalize()
-            
-            samples = np.array(audio.get_array_of_samples())
-            if audio.channels == 2:
-                samples = samples.reshape((-1, 2)).mean(axis=1)
-            samples = samples.astype(np.float32) / 32768.0
-            duration = len(samples) / audio.frame_rate
+            if audio is None:
+                audio = await asyncio.to_thread(self.synthesize_speech, text)
+            samples, frame_rate = audio
+            duration = len(samples) / frame_rate
             
-            # Perfect sync
+            # Perfect sync: playback runs off the event loop so animation and cues keep ticking
             animation_task = asyncio.create_task(self.voice_animator.animate_speech(duration))
             sd.default.blocksize = 4096
-            sd.play(samples, audio.frame_rate, blocking=True)
+            sd.play(samples, frame_rate)
+            start = asyncio.get_event_loop().time()
+            if on_start:
+                on_start(start, duration)
+            if cues:
+                gesture_task = asyncio.create_task(self.dispatch_cues(cues, start, duration))
+            await asyncio.to_thread(sd.wait)
             await animation_task
+            if gesture_task:
+                await gesture_task
+            return audio
+        except asyncio.CancelledError:
+            sd.stop()
+            self.voice_animator.stop_animation()
+            raise
         except Exception as e:
             logger.error(f"TTS: {e}")
+            return None
         finally:
+            if gesture_task and not gesture_task.done():
+                gesture_task.cancel()
             sd.default.blocksize = 0
 
+    async def dispatch_cues(self, cues: List[Tuple[float, str]], start: float, duration: float):
+        """Perform each gesture when the playback clock reaches its sentence."""
+        loop = asyncio.get_event_loop()
+        affect = self.get_user_affect()
+        if affect:
+            cues = self.emotion_analyzer.blend_user_affect(cues, affect["emotion"])
+        for offset, emotion in cues:
+            delay = start + offset * duration - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            logger.info(f"🎭 {emotion} @ {offset * duration:.1f}s")
+            await asyncio.to_thread(self.gesture_controller.perform_gesture, emotion)
+
     async def process_turn(self, user_text: str) -> None:
         """Full turn."""
         if not user_text: return
-        self.history.append({"role": "user", "content": user_text})
-        response = await self.get_claude_response(user_text)
-        self.history.append({"role": "assistant", "content": response})
-        emotion = self.emotion_analyzer.analyze(response)
-        logger.info(f"🎭 {emotion}")
-        await asyncio.gather(
-            asyncio.to_thread(self.gesture_controller.perform_gesture, emotion),
-            self.speak_response(response))
+        turn = await self.pipeline.submit(Turn(user_text))
+        await turn.wait()
+
+    def close(self):
+        """Release per-session resources (a private STT service)."""
+        if self.stt: self.stt.close()
 
     def clear_history(self):
+        """Cancel in-flight turns and forget the conversation. Call from the event loop."""
+        self.pipeline.cancel_all()
         self.history = []
         logger.info("🧹 Cleared")
\ No newline at end of file
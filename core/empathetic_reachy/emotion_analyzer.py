@@ -2,7 +2,8 @@ import re
 import logging
 import random
 from textblob import TextBlob # type: ignore
-from typing import Tuple, Optional
+from textblob.exceptions import MissingCorpusError # type: ignore
+from typing import Dict, List, Tuple, Optional
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -35,11 +36,21 @@ class EmotionAnalyzer:
         r"\b(wait|let me see|hmm)\b": "thinking",
     }
 
+    # Gesture answering the user's own expression when the reply itself is neutral
+    USER_AFFECT_GESTURES = {"happy": "happy", "sad": "empathy", "surprised": "surprised"}
+
+    # A sentence: up to and including its terminal punctuation (or end of text)
+    SENTENCE_RE = re.compile(r"[^\s.!?][^.!?]*(?:[.!?]+|$)")
+
     def __init__(self, nvidia_api_key: Optional[str] = None, simulation_mode: bool = True):
         self.nvidia_api_key = nvidia_api_key
         self.simulation_mode = simulation_mode
         self._cache = {}
         self.metrics = {"total": 0, "keyword": 0, "api": 0, "fallback": 0}
+        # All keyword patterns in one alternation; group index = KEYWORD_MAP priority
+        self._keyword_emotions = list(self.KEYWORD_MAP.values())
+        self._keyword_re = re.compile("|".join(
+            f"(?P<k{i}>{pattern})" for i, pattern in enumerate(self.KEYWORD_MAP)))
 
     def analyze(self, text: str) -> str:
         """Analyze text and return the dominant emotion."""
@@ -63,10 +74,15 @@ class EmotionAnalyzer:
                 return emotion, 0.9
 
         # 3. Sentiment Analysis (Fallback)
+        return self._sentiment(text, text_lower)
+
+    def _sentiment(self, text: str, cache_key: str) -> Tuple[str, float]:
+        """TextBlob polarity -> (emotion, confidence), cached under cache_key."""
         # Using TextBlob for simple polarity/subjectivity
-        blob = TextBlob(text)
-        polarity = blob.sentiment.polarity
-        
+        polarity = TextBlob(text).sentiment.polarity
+        return self._from_polarity(polarity, cache_key)
+
+    def _from_polarity(self, polarity: float, cache_key: str) -> Tuple[str, float]:
         emotion = "neutral"
         confidence = 0.5
 
@@ -86,10 +102,62 @@ class EmotionAnalyzer:
         self.metrics["fallback"] += 1
         
         # Cache result
-        self._cache[text_lower] = (emotion, confidence)
+        self._cache[cache_key] = (emotion, confidence)
         logger.info(f"Emotion (TextBlob): {emotion} ({polarity})")
         return emotion, confidence
 
+    def analyze_timeline(self, text: str) -> List[Tuple[float, str]]:
+        """
+        Per-sentence emotion cues as (offset, emotion), offset being the
+        sentence start as a fraction of the text (~ of the spoken audio).
+        One TextBlob for the whole reply supplies sentences, offsets and
+        polarity; sentences with keywords skip sentiment. Consecutive
+        repeats are merged.
+        """
+        blob = TextBlob(text)
+        try:
+            sentences = [(s.start, str(s), s) for s in blob.sentences]
+        except MissingCorpusError:
+            # No NLTK punkt data: split by regex, score with the same blob's analyzer
+            sentences = [(m.start(), m.group().rstrip(), None) for m in self.SENTENCE_RE.finditer(text)]
+        total = max(len(text), 1)
+        cues: List[Tuple[float, str]] = []
+        for start, sentence, parsed in sentences:
+            sentence_lower = sentence.lower()
+            self.metrics["total"] += 1
+            hits = [int(hit.lastgroup[1:]) for hit in self._keyword_re.finditer(sentence_lower)]
+            if hits:
+                self.metrics["keyword"] += 1
+                emotion = self._keyword_emotions[min(hits)]
+            elif sentence_lower in self._cache:
+                emotion = self._cache[sentence_lower][0]
+            else:
+                polarity = (parsed.sentiment if parsed is not None else blob.analyzer.analyze(sentence)).polarity
+                emotion = self._from_polarity(polarity, sentence_lower)[0]
+            if not cues or cues[-1][1] != emotion:
+                cues.append((start / total, emotion))
+        if not cues:
+            cues.append((0.0, "neutral"))
+        logger.info(f"Emotion timeline: {[e for _, e in cues]}")
+        return cues
+
+    @staticmethod
+    def dominant_emotion(cues: List[Tuple[float, str]]) -> str:
+        """Emotion covering most of the reply; neutral only if nothing else is cued."""
+        shares: Dict[str, float] = {}
+        ends = [offset for offset, _ in cues[1:]] + [1.0]
+        for (offset, emotion), end in zip(cues, ends):
+            shares[emotion] = shares.get(emotion, 0.0) + end - offset
+        expressive = {e: share for e, share in shares.items() if e != "neutral"}
+        return max(expressive, key=expressive.get) if expressive else "neutral"
+
+    def blend_user_affect(self, cues: List[Tuple[float, str]], user_emotion: str) -> List[Tuple[float, str]]:
+        """Open with a gesture reacting to the user's face if the reply starts neutral."""
+        gesture = self.USER_AFFECT_GESTURES.get(user_emotion)
+        if not gesture or not cues or cues[0][1] != "neutral":
+            return cues
+        return [(cues[0][0], gesture)] + cues[1:]
+
     def get_gesture_for_emotion(self, emotion: str) -> str:
         """Maps an emotion string to a valid gesture command."""
         if emotion == "greeting": return "greeting"
@@ -0,0 +1,129 @@
+import logging
+import multiprocessing as mp
+import time
+from collections import deque
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger("FaceMeshWorker")
+
+
+def _worker_main(shm_name: str, ring_shape: Tuple[int, ...], conn, refine_landmarks: bool):
+    """Child process: FaceMesh + PnP on ring slots, poses back over the pipe."""
+    import mediapipe
+    from .head_mirroring import solve_head_pose
+    from .user_affect import affect_features
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray(ring_shape, dtype=np.uint8, buffer=shm.buf)
+    img_h, img_w = ring_shape[1:3]
+    face_mesh = mediapipe.solutions.face_mesh.FaceMesh(
+        max_num_faces=1, min_detection_confidence=0.6,
+        min_tracking_confidence=0.6, refine_landmarks=refine_landmarks)
+    try:
+        while True:
+            msg = conn.recv()
+            if msg is None:
+                break
+            slot, seq = msg
+            results = face_mesh.process(ring[slot])
+            pose = features = None
+            if results.multi_face_landmarks:
+                face = results.multi_face_landmarks[0]
+                pose = solve_head_pose(face, img_w, img_h)
+                features = affect_features(face, img_w, img_h)
+            conn.send((slot, seq, pose, features))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        face_mesh.close()
+        del ring
+        shm.close()
+
+
+class FaceMeshWorker:
+    """
+    Runs FaceMesh detection in a separate process so it never competes for
+    the GIL with Whisper, TTS or the UI. Frames are copied into a
+    multiprocessing.shared_memory ring; only slot indices go out and small
+    pose dicts (plus expression features) come back over a Pipe.
+    """
+
+    def __init__(self, frame_shape: Tuple[int, int, int] = (360, 480, 3), slots: int = 3,
+                 refine_landmarks: bool = False):
+        self.frame_shape = tuple(frame_shape)
+        self.slots = slots
+        self.refine_landmarks = refine_landmarks
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._ring: Optional[np.ndarray] = None
+        self._conn = None
+        self._process = None
+        self._free: deque = deque()
+        self._pending: Dict[int, float] = {}
+        self._seq = 0
+
+    @property
+    def running(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        if self._process: return
+        ring_shape = (self.slots,) + self.frame_shape
+        self._shm = shared_memory.SharedMemory(create=True, size=int(np.prod(ring_shape)))
+        self._ring = np.ndarray(ring_shape, dtype=np.uint8, buffer=self._shm.buf)
+        ctx = mp.get_context("spawn")
+        self._conn, child_conn = ctx.Pipe()
+        self._process = ctx.Process(
+            target=_worker_main, args=(self._shm.name, ring_shape, child_conn, self.refine_landmarks),
+            daemon=True, name="FaceMeshWorker")
+        self._process.start()
+        child_conn.close()
+        self._free = deque(range(self.slots))
+        self._pending = {}
+        logger.info(f"FaceMesh worker started (pid {self._process.pid}, {self.slots} slots)")
+
+    def submit(self, image_rgb: np.ndarray) -> bool:
+        """Queue a frame. Returns False (frame dropped) when every slot is in flight."""
+        if not self._free: return False
+        slot = self._free.popleft()
+        if image_rgb.shape != self.frame_shape:
+            image_rgb = cv2.resize(image_rgb, (self.frame_shape[1], self.frame_shape[0]))
+        np.copyto(self._ring[slot], image_rgb)
+        self._seq += 1
+        self._pending[self._seq] = time.perf_counter()
+        self._conn.send((slot, self._seq))
+        return True
+
+    def poll(self, timeout: float = 0.0) -> List[Dict]:
+        """Collect finished results: [{'seq', 'pose', 'features' (None if no face), 'latency'}]."""
+        results = []
+        while self._pending and self._conn.poll(timeout):
+            slot, seq, pose, features = self._conn.recv()
+            self._free.append(slot)
+            latency = time.perf_counter() - self._pending.pop(seq)
+            results.append({"seq": seq, "pose": pose, "features": features, "latency": latency})
+            timeout = 0.0
+        return results
+
+    def stop(self):
+        if self._process is None: return
+        try:
+            self._conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self._process.join(timeout=2.0)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._conn.close()
+        self._ring = None
+        self._shm.close()
+        self._shm.unlink()
+        self._process = self._conn = self._shm = None
+        logger.info("FaceMesh worker stopped")
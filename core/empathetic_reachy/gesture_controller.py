@@ -1,8 +1,8 @@
 import time
 import logging
 from typing import List
-import numpy as np
-from reachy_mini.utils import create_head_pose
+
+from .pose_cache import cached_antennas, cached_head_pose
 
 logger = logging.getLogger("GestureController")
 
@@ -67,8 +67,8 @@ class GestureController:
 
     def _move(self, yaw, pitch, roll, ant_l_deg, ant_r_deg, duration):
         """Execute single movement."""
-        head_pos = create_head_pose(0, 0, 0, roll, pitch, yaw, mm=True, degrees=True)
-        antennas_rad = np.deg2rad([ant_l_deg, ant_r_deg])
+        head_pos = cached_head_pose(roll, pitch, yaw)
+        antennas_rad = cached_antennas(ant_l_deg, ant_r_deg)
         try:
             self.mini.goto_target(head_pos, antennas_rad, duration)
         except Exception as e:
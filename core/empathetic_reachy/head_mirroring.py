@@ -4,33 +4,70 @@ import time
 import mediapipe as mp
 import numpy as np
 import logging
-from reachy_mini.utils import create_head_pose
+from typing import Dict, Optional
+
+from . import config
+from .face_mesh_worker import FaceMeshWorker
+from .pose_cache import head_pose
+from .quality_governor import governor
+from .user_affect import UserAffectEstimator, affect_features
 
 logger = logging.getLogger("HeadMirroring")
 
+FACE_3D_MODEL = np.array([
+    (0.0, 0.0, 0.0), (0.0, -330.0, -65.0),
+    (-225.0, 170.0, -135.0), (225.0, 170.0, -135.0),
+    (-150.0, -150.0, -125.0), (150.0, -150.0, -125.0)], dtype=np.float64)
+KEY_LANDMARKS = [1, 152, 263, 33, 291, 61]
+
+
+def solve_head_pose(face_landmarks, img_w, img_h) -> Dict[str, float]:
+    """Fast pose calc (PnP on six FaceMesh landmarks)."""
+    face_2d = np.array([[int(face_landmarks.landmark[i].x * img_w),
+                        int(face_landmarks.landmark[i].y * img_h)]
+                       for i in KEY_LANDMARKS], dtype=np.float64)
+    focal = img_w
+    cam_matrix = np.array([[focal, 0, img_w/2], [0, focal, img_h/2], [0, 0, 1]])
+    success, rot_vec, _ = cv2.solvePnP(FACE_3D_MODEL, face_2d, cam_matrix,
+                                       np.zeros((4, 1)), flags=cv2.SOLVEPNP_ITERATIVE)
+    if not success:
+        return {'pitch': 0, 'yaw': 0, 'roll': 0}
+    rmat, _ = cv2.Rodrigues(rot_vec)
+    euler = cv2.decomposeProjectionMatrix(np.hstack((rmat, rot_vec)))[6]
+    return {'pitch': float(euler[0,0]), 'yaw': float(euler[1,0]), 'roll': float(euler[2,0])}
+
+
 class HeadMirroringController:
     """PERFECT: Ultra-smooth head tracking."""
-    
-    def __init__(self, reachy_mini):
+
+    def __init__(self, reachy_mini, use_process: Optional[bool] = None):
         self.mini = reachy_mini
         self.running = False
         self.thread = None
+        # Detection in a separate process (shared-memory frames) or in this one
+        self.use_process = config.MIRROR_INFERENCE_PROCESS if use_process is None else use_process
+        self.worker: Optional[FaceMeshWorker] = None
+        self.worker_restarts = 0
+        self.face_detected = False
+        self.pose_latency = 0.0  # Seconds from frame to pose, last result
+        self.user_affect = UserAffectEstimator()
+        self.camera_size = None
         self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(
-            max_num_faces=1, min_detection_confidence=0.6,
-            min_tracking_confidence=0.6, refine_landmarks=False)
-        
+        self.face_mesh = None
+        self.refine_landmarks = governor.settings("vision")["refine_landmarks"]
+        if not self.use_process:
+            self.face_mesh = self.mp_face_mesh.FaceMesh(
+                max_num_faces=1, min_detection_confidence=0.6,
+                min_tracking_confidence=0.6, refine_landmarks=self.refine_landmarks)
+
         # PERFECT smoothing
         self.smoothing = 0.25
         self.prev_pitch = self.prev_yaw = self.prev_roll = 0
         self.pitch_offset = self.yaw_offset = self.roll_offset = 0
         self.calibrated = False
-        
-        self.face_3d_model = np.array([
-            (0.0, 0.0, 0.0), (0.0, -330.0, -65.0),
-            (-225.0, 170.0, -135.0), (225.0, 170.0, -135.0),
-            (-150.0, -150.0, -125.0), (150.0, -150.0, -125.0)], dtype=np.float64)
-        self.key_landmarks = [1, 152, 263, 33, 291, 61]
+
+        self.face_3d_model = FACE_3D_MODEL
+        self.key_landmarks = KEY_LANDMARKS
 
     def start_mirroring(self, camera_index=0):
         if self.running: return
@@ -52,52 +89,130 @@ class HeadMirroringController:
             self.running = False
             return
 
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 480)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 360)
         cap.set(cv2.CAP_PROP_FPS, 30)
+        self.camera_size = None
 
         frame_count = 0
-        while self.running and cap.isOpened():
-            frame_count += 1
-            success, image = cap.read()
-            if not success:
-                time.sleep(0.01)
-                continue
-
-            # Process every 2nd frame
-            if frame_count % 2 != 0:
-                time.sleep(0.005)
-                continue
-
-            image = cv2.flip(image, 1)
-            img_h, img_w = image.shape[:2]
-            image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            image_rgb.flags.writeable = False
+        try:
+            while self.running and cap.isOpened():
+                settings = self.configure_camera(cap)
+                frame_count += 1
+                success, image = cap.read()
+                if not success:
+                    time.sleep(0.01)
+                    continue
+
+                # Process every Nth frame (2nd by default)
+                if frame_count % settings["inference_every"] != 0:
+                    time.sleep(0.005)
+                    continue
+
+                image = cv2.flip(image, 1)
+                image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+                image_rgb.flags.writeable = False
+                self.process_frame(image_rgb)
+                time.sleep(0.01 * settings["sleep_scale"])
+        finally:
+            cap.release()
+            self.release()
+
+    def configure_camera(self, cap) -> Dict:
+        """Apply the governor's camera size if it changed; returns the vision settings."""
+        settings = governor.settings("vision")
+        if settings["camera"] != self.camera_size:
+            width, height = settings["camera"]
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+            self.camera_size = settings["camera"]
+        return settings
+
+    def _ensure_detector(self, image_shape):
+        """(Re)create FaceMesh when the frame size or landmark refinement changes."""
+        refine = governor.settings("vision")["refine_landmarks"]
+        if self.use_process and self.worker and not self.worker.running:
+            self._stop_worker()
+            self.worker_restarts += 1
+            if self.worker_restarts > config.MIRROR_WORKER_MAX_RESTARTS:
+                logger.error("❌ FaceMesh worker keeps dying, detecting in-process")
+                self.use_process = False
+            else:
+                logger.error(f"❌ FaceMesh worker died, restarting "
+                             f"({self.worker_restarts}/{config.MIRROR_WORKER_MAX_RESTARTS})")
+        if not self.use_process:
+            if self.face_mesh is None or refine != self.refine_landmarks:
+                if self.face_mesh: self.face_mesh.close()
+                self.face_mesh = self.mp_face_mesh.FaceMesh(
+                    max_num_faces=1, min_detection_confidence=0.6,
+                    min_tracking_confidence=0.6, refine_landmarks=refine)
+        else:
+            if self.worker and (self.worker.frame_shape != image_shape or refine != self.refine_landmarks):
+                self._stop_worker()
+            if self.worker is None:
+                self.worker = FaceMeshWorker(image_shape, slots=config.MIRROR_RING_SLOTS,
+                                             refine_landmarks=refine)
+                self.worker.start()
+        self.refine_landmarks = refine
+
+    def process_frame(self, image_rgb) -> bool:
+        """Detect + mirror one RGB frame. Returns whether the latest result saw a face."""
+        self._ensure_detector(image_rgb.shape)
+        if not self.use_process:
+            img_h, img_w = image_rgb.shape[:2]
+            start = time.perf_counter()
             results = self.face_mesh.process(image_rgb)
-            
+            pose = features = None
             if results.multi_face_landmarks:
-                pose = self.calculate_head_pose(results.multi_face_landmarks[0], img_w, img_h)
-                if not self.calibrated:
-                    self.pitch_offset, self.yaw_offset, self.roll_offset = pose['pitch'], pose['yaw'], pose['roll']
-                    self.calibrated = True
-                self.mirror_to_reachy(pose)
-            time.sleep(0.01)
-        cap.release()
+                face = results.multi_face_landmarks[0]
+                pose = self.calculate_head_pose(face, img_w, img_h)
+                features = affect_features(face, img_w, img_h)
+            self.pose_latency = time.perf_counter() - start
+            governor.record("vision", self.pose_latency)
+            self._apply_pose(pose, features)
+            return self.face_detected
+
+        try:
+            if not self.worker.submit(image_rgb):
+                # Ring full: wait briefly for the oldest frame instead of queueing more
+                for result in self.worker.poll(timeout=0.05):
+                    self._handle_result(result)
+                self.worker.submit(image_rgb)
+            for result in self.worker.poll():
+                self._handle_result(result)
+        except (BrokenPipeError, EOFError, OSError) as e:
+            # Worker died mid-frame; _ensure_detector restarts or falls back next frame
+            logger.debug(f"Worker pipe: {e}")
+            self.face_detected = False
+        return self.face_detected
+
+    def _stop_worker(self):
+        if self.worker:
+            self.worker.stop()
+            self.worker = None
+
+    def release(self):
+        """Stop the detection worker process, if any, and forget the user's expression."""
+        self._stop_worker()
+        self.user_affect.reset()
+
+    def _handle_result(self, result):
+        self.pose_latency = result["latency"]
+        governor.record("vision", self.pose_latency)
+        self._apply_pose(result["pose"], result["features"])
+
+    def _apply_pose(self, pose, features=None):
+        self.face_detected = pose is not None
+        if pose is None: return
+        if not self.calibrated:
+            self.pitch_offset, self.yaw_offset, self.roll_offset = pose['pitch'], pose['yaw'], pose['roll']
+            self.user_affect.reset()
+            self.calibrated = True
+        if features is not None:
+            self.user_affect.update(features)
+        self.mirror_to_reachy(pose)
 
     def calculate_head_pose(self, face_landmarks, img_w, img_h):
         """Fast pose calc."""
-        face_2d = np.array([[int(face_landmarks.landmark[i].x * img_w), 
-                            int(face_landmarks.landmark[i].y * img_h)] 
-                           for i in self.key_landmarks], dtype=np.float64)
-        focal = img_w
-        cam_matrix = np.array([[focal, 0, img_w/2], [0, focal, img_h/2], [0, 0, 1]])
-        success, rot_vec, _ = cv2.solvePnP(self.face_3d_model, face_2d, cam_matrix, 
-                                           np.zeros((4, 1)), flags=cv2.SOLVEPNP_ITERATIVE)
-        if not success:
-            return {'pitch': 0, 'yaw': 0, 'roll': 0}
-        rmat, _ = cv2.Rodrigues(rot_vec)
-        euler = cv2.decomposeProjectionMatrix(np.hstack((rmat, rot_vec)))[6]
-        return {'pitch': float(euler[0,0]), 'yaw': float(euler[1,0]), 'roll': float(euler[2,0])}
+        return solve_head_pose(face_landmarks, img_w, img_h)
 
     def mirror_to_reachy(self, pose):
         """PERFECT sync."""
@@ -113,13 +228,13 @@ class HeadMirroringController:
         final_pitch = np.clip(-pitch, -20, 20)
         final_yaw = np.clip(yaw, -40, 40)
         final_roll = np.clip(roll, -30, 30)
-        
+
         if abs(final_pitch) < 1.5: final_pitch = 0
         if abs(final_yaw) < 1.5: final_yaw = 0
         if abs(final_roll) < 1.5: final_roll = 0
 
         try:
-            head_pos = create_head_pose(0, 0, 0, final_roll, final_pitch, final_yaw, mm=True, degrees=True)
+            head_pos = head_pose(final_roll, final_pitch, final_yaw)
             self.mini.goto_target(head_pos, duration=0.1)
         except Exception as e:
-            logger.debug(f"Error: {e}")
\ No newline at end of file
+            logger.debug(f"Error: {e}")
@@ -0,0 +1,69 @@
+from functools import lru_cache
+
+import numpy as np
+
+from . import config
+
+
+def head_poses(roll, pitch, yaw) -> np.ndarray:
+    """
+    (N, 4, 4) head transforms from arrays of roll/pitch/yaw in degrees, in one
+    numpy pass. Same as create_head_pose(0, 0, 0, roll, pitch, yaw,
+    mm=True, degrees=True) per element (extrinsic xyz: Rz @ Ry @ Rx).
+    """
+    r, p, y = np.deg2rad(np.broadcast_arrays(
+        np.atleast_1d(np.asarray(roll, dtype=float)),
+        np.atleast_1d(np.asarray(pitch, dtype=float)),
+        np.atleast_1d(np.asarray(yaw, dtype=float))))
+    sr, cr, sp, cp, sy, cy = np.sin(r), np.cos(r), np.sin(p), np.cos(p), np.sin(y), np.cos(y)
+    poses = np.zeros(r.shape + (4, 4))
+    poses[..., 0, 0] = cy * cp
+    poses[..., 0, 1] = cy * sp * sr - sy * cr
+    poses[..., 0, 2] = cy * sp * cr + sy * sr
+    poses[..., 1, 0] = sy * cp
+    poses[..., 1, 1] = sy * sp * sr + cy * cr
+    poses[..., 1, 2] = sy * sp * cr - cy * sr
+    poses[..., 2, 0] = -sp
+    poses[..., 2, 1] = cp * sr
+    poses[..., 2, 2] = cp * cr
+    poses[..., 3, 3] = 1.0
+    return poses
+
+
+def head_pose(roll: float, pitch: float, yaw: float) -> np.ndarray:
+    """One 4x4 head transform (degrees), uncached - for continuous poses like mirroring."""
+    return head_poses(roll, pitch, yaw)[0]
+
+
+def _quantize(value: float) -> int:
+    return int(round(value / config.POSE_CACHE_STEP_DEG))
+
+
+@lru_cache(maxsize=config.POSE_CACHE_SIZE)
+def _cached_pose(q_roll: int, q_pitch: int, q_yaw: int) -> np.ndarray:
+    step = config.POSE_CACHE_STEP_DEG
+    pose = head_pose(q_roll * step, q_pitch * step, q_yaw * step)
+    pose.flags.writeable = False  # Shared between callers
+    return pose
+
+
+@lru_cache(maxsize=config.POSE_CACHE_SIZE)
+def _cached_antennas(q_left: int, q_right: int) -> np.ndarray:
+    step = config.POSE_CACHE_STEP_DEG
+    antennas = np.deg2rad([q_left * step, q_right * step])
+    antennas.flags.writeable = False
+    return antennas
+
+
+def cached_head_pose(roll: float, pitch: float, yaw: float) -> np.ndarray:
+    """Read-only head transform, quantized to POSE_CACHE_STEP_DEG and memoized (gesture keyframes, rest pose)."""
+    return _cached_pose(_quantize(roll), _quantize(pitch), _quantize(yaw))
+
+
+def cached_antennas(left_deg: float, right_deg: float) -> np.ndarray:
+    """Read-only antenna targets in radians, quantized and memoized like head poses."""
+    return _cached_antennas(_quantize(left_deg), _quantize(right_deg))
+
+
+def cache_info() -> dict:
+    return {"poses": _cached_pose.cache_info(), "antennas": _cached_antennas.cache_info()}
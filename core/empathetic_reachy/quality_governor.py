@@ -0,0 +1,119 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from . import config
+
+logger = logging.getLogger("QualityGovernor")
+
+
+class QualityGovernor:
+    """
+    Picks a quality level per domain ("stt", "vision", "animation") from
+    config.QUALITY_LEVELS (best first) against config.LATENCY_TARGETS.
+    Steps down when a domain's smoothed latency or the CPU load is over
+    budget, back up when there is clear headroom. Pinned domains never move.
+    """
+
+    def __init__(self, enabled: Optional[bool] = None, levels: Optional[Dict] = None,
+                 targets: Optional[Dict] = None, pinned: Optional[Dict] = None):
+        self.enabled = config.QUALITY_GOVERNOR_ENABLED if enabled is None else enabled
+        self.levels = levels or config.QUALITY_LEVELS
+        self.targets = targets or config.LATENCY_TARGETS
+        self.pinned = dict(config.QUALITY_PINNED if pinned is None else pinned)
+        self.current = {d: self.pinned.get(d, config.QUALITY_DEFAULT_LEVELS[d]) for d in self.levels}
+        self._ewma = {d: 0.0 for d in self.levels}
+        self._samples = {d: 0 for d in self.levels}
+        self._last_switch = {d: 0.0 for d in self.levels}
+        self._lock = threading.Lock()
+
+    def settings(self, domain: str) -> Dict:
+        """Current settings dict for a domain."""
+        return self.levels[domain][self.current[domain]]
+
+    def set_levels(self, domain: str, levels: List[Dict], default: int = 0):
+        """Replace a domain's ladder (e.g. when a backend can't change some settings)."""
+        with self._lock:
+            self.levels = dict(self.levels, **{domain: levels})
+            self.current[domain] = min(self.pinned.get(domain, default), len(levels) - 1)
+            self._samples[domain] = 0
+        logger.info(f"⚙️ {domain}: {len(levels)} levels, at {self.current[domain]} {self.settings(domain)}")
+
+    def pin(self, domain: str, level: Optional[int]):
+        """Fix a domain at a level index, or unpin with None."""
+        with self._lock:
+            if level is None:
+                self.pinned.pop(domain, None)
+                logger.info(f"📌 {domain}: unpinned")
+                return
+            self.pinned[domain] = level
+            self._switch(domain, level, "pinned")
+
+    def record(self, domain: str, latency: float):
+        """Feed one latency sample (seconds, or RTF for stt) and maybe switch level."""
+        if not self.enabled: return
+        with self._lock:
+            n = self._samples[domain]
+            alpha = config.QUALITY_EWMA_ALPHA
+            self._ewma[domain] = latency if n == 0 else self._ewma[domain] * (1 - alpha) + latency * alpha
+            self._samples[domain] = n + 1
+            self._evaluate(domain)
+
+    def _evaluate(self, domain: str):
+        if domain in self.pinned or self._samples[domain] < config.QUALITY_MIN_SAMPLES:
+            return
+        if time.monotonic() - self._last_switch[domain] < config.QUALITY_SWITCH_COOLDOWN:
+            return
+        latency, target, cpu = self._ewma[domain], self.targets[domain], cpu_load()
+        level = self.current[domain]
+        reason = f"latency {latency:.3f}/{target:.3f}, cpu {cpu:.0%}"
+        if (latency > target or cpu > config.CPU_LOAD_TARGET) and level < len(self.levels[domain]) - 1:
+            self._switch(domain, level + 1, f"over budget ({reason})")
+        elif latency < target * config.QUALITY_HEADROOM and cpu < config.CPU_LOAD_TARGET * config.QUALITY_HEADROOM \
+                and level > 0:
+            self._switch(domain, level - 1, f"headroom ({reason})")
+
+    def _switch(self, domain: str, level: int, reason: str):
+        old = self.current[domain]
+        self.current[domain] = level
+        self._samples[domain] = 0
+        self._last_switch[domain] = time.monotonic()
+        if level != old:
+            logger.info(f"⚙️ {domain}: level {old} → {level} {self.levels[domain][level]} [{reason}]")
+
+
+class CPUMeter:
+    """
+    This process's CPU use (all threads) per core over the last window, from
+    time.process_time() deltas: reacts within seconds and ignores other
+    processes, unlike the 1-minute system load average.
+    """
+
+    def __init__(self, window: Optional[float] = None):
+        self.window = window or config.CPU_SAMPLE_WINDOW
+        self._last = (time.monotonic(), time.process_time())
+        self._load = 0.0
+        self._lock = threading.Lock()
+
+    def load(self) -> float:
+        with self._lock:
+            now, cpu = time.monotonic(), time.process_time()
+            elapsed = now - self._last[0]
+            if elapsed >= self.window:
+                self._load = (cpu - self._last[1]) / (elapsed * (os.cpu_count() or 1))
+                self._last = (now, cpu)
+            return self._load
+
+
+_cpu_meter = CPUMeter()
+
+
+def cpu_load() -> float:
+    """This process's recent CPU use per core (see CPUMeter)."""
+    return _cpu_meter.load()
+
+
+# Shared by the conversation, mirroring and animation loops
+governor = QualityGovernor()
@@ -0,0 +1,83 @@
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger("ResponseCache")
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of finished replies for frequent conversational turns.
+    Keyed by a normalized utterance plus a fingerprint of the context the
+    LLM would have seen, so "Hi!" and "hi" share an entry but the same words
+    mid-conversation do not collide with an opener.
+    """
+
+    _PUNCT_RE = re.compile(r"[^\w\s']")
+    _SPACE_RE = re.compile(r"\s+")
+
+    def __init__(self, max_entries: int = 256, ttl: float = 3600.0, context_turns: int = 2):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.context_turns = context_turns
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @classmethod
+    def normalize(cls, text: str) -> str:
+        """Lowercase, drop punctuation and collapse whitespace."""
+        text = cls._PUNCT_RE.sub(" ", text.lower())
+        return cls._SPACE_RE.sub(" ", text).strip()
+
+    def key(self, user_text: str, history: List[Dict], system_prompt: str) -> str:
+        """Cache key for an utterance given the history that precedes it."""
+        recent = history[-self.context_turns:] if self.context_turns else []
+        context = "\x1f".join([system_prompt] + [f"{m['role']}:{self.normalize(m['content'])}"
+                                                 for m in recent])
+        fingerprint = hashlib.sha1(context.encode("utf-8")).hexdigest()[:16]
+        return f"{self.normalize(user_text)}|{fingerprint}"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Return the entry for key, or None. Counts toward the hit rate."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() > entry["expires"]:
+                del self._entries[key]
+                self.metrics["expired"] += 1
+                entry = None
+            if entry is None:
+                self.metrics["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.metrics["hits"] += 1
+            return entry
+
+    def put(self, key: str, response: str, emotion: str, cues: Optional[List] = None,
+            audio=None) -> Dict:
+        """Store a reply. Audio may be attached later via the returned entry."""
+        entry = {"response": response, "emotion": emotion, "cues": cues, "audio": audio,
+                 "expires": time.monotonic() + self.ttl}
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.metrics["evictions"] += 1
+        return entry
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.metrics["hits"] + self.metrics["misses"]
+        return self.metrics["hits"] / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Local speech-recognition service.
+
+Keeps one warm WhisperModel (with several concurrent decoding workers) in
+its own process and serves int16 PCM buffers over an authenticated
+multiprocessing.connection socket, so any number of ConversationManager
+sessions share one model copy and CPU-heavy inference stays out of the UI
+process. Messages are a JSON header line plus raw PCM bytes; nothing
+received is unpickled.
+
+    REACHY_STT_AUTHKEY=<secret> python -m core.empathetic_reachy.stt_service --model small --workers 2
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing as mp
+import queue
+import secrets
+import threading
+import time
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from . import config
+
+logger = logging.getLogger("STTService")
+
+
+def _encode(header: Dict, payload: bytes = b"") -> bytes:
+    return json.dumps(header).encode("utf-8") + b"\n" + payload
+
+
+def _decode(message: bytes):
+    header, _, payload = message.partition(b"\n")
+    return json.loads(header), payload
+
+
+class STTServer:
+    """Bounded request queue feeding N transcription threads on one model."""
+
+    def __init__(self, address=None, authkey: Optional[bytes] = None, model: Optional[str] = None,
+                 num_workers: Optional[int] = None, max_queue: Optional[int] = None, ready=None):
+        self.address = address or config.STT_SERVICE_ADDRESS
+        self.ready = ready  # Connection told the bound address (or bind error) once listening
+        self.authkey = authkey or config.STT_SERVICE_AUTHKEY
+        if not self.authkey:
+            raise ValueError("STT service needs an authkey (set REACHY_STT_AUTHKEY)")
+        self.model_name = model or config.WHISPER_MODEL
+        self.num_workers = num_workers or config.STT_SERVICE_WORKERS
+        self._jobs: "queue.Queue[Dict]" = queue.Queue(maxsize=max_queue or config.STT_SERVICE_MAX_QUEUE)
+        self._stats_lock = threading.Lock()
+        self.metrics = {"requests": 0, "rejected": 0, "errors": 0, "active": 0,
+                        "audio_seconds": 0.0, "inference_seconds": 0.0}
+        self.model = None
+
+    def serve_forever(self):
+        # Bind first so clients can connect (and queue) while the model loads
+        try:
+            listener = Listener(self.address, authkey=self.authkey)
+        except OSError as e:
+            if self.ready: self.ready.send({"error": str(e)})
+            raise
+        self.address = listener.address  # Real port when asked for port 0
+        if self.ready:
+            self.ready.send({"address": self.address})
+            self.ready.close()
+        logger.info(f"🎧 STT service on {self.address}, loading Whisper {self.model_name}...")
+        from faster_whisper import WhisperModel
+        self.model = WhisperModel(self.model_name, device="cpu", compute_type="int8",
+                                  num_workers=self.num_workers)
+        for i in range(self.num_workers):
+            threading.Thread(target=self._transcribe_loop, daemon=True, name=f"stt-{i}").start()
+        logger.info(f"✅ STT ready ({self.num_workers} workers)")
+        try:
+            while True:
+                conn = listener.accept()
+                threading.Thread(target=self._handle_client, args=(conn,), daemon=True).start()
+        finally:
+            listener.close()
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            stats = dict(self.metrics)
+        stats["queued"] = self._jobs.qsize()
+        stats["rtf"] = stats["inference_seconds"] / stats["audio_seconds"] if stats["audio_seconds"] else 0.0
+        return stats
+
+    def _handle_client(self, conn):
+        try:
+            while True:
+                request, pcm = _decode(conn.recv_bytes())
+                if request.get("cmd") == "stats":
+                    conn.send_bytes(_encode(self.stats()))
+                    continue
+                job = {"request": request, "pcm": pcm, "done": threading.Event(), "result": None}
+                try:
+                    self._jobs.put_nowait(job)
+                except queue.Full:
+                    with self._stats_lock:
+                        self.metrics["rejected"] += 1
+                    conn.send_bytes(_encode({"error": "busy"}))
+                    continue
+                job["done"].wait()
+                conn.send_bytes(_encode(job["result"]))
+        except (EOFError, OSError, ValueError):
+            pass
+        finally:
+            conn.close()
+
+    def _transcribe_loop(self):
+        while True:
+            job = self._jobs.get()
+            with self._stats_lock:
+                self.metrics["active"] += 1
+            try:
+                job["result"] = self._transcribe(job["request"], job["pcm"])
+            except Exception as e:
+                logger.error(f"Transcribe: {e}")
+                with self._stats_lock:
+                    self.metrics["errors"] += 1
+                job["result"] = {"error": str(e)}
+            finally:
+                with self._stats_lock:
+                    self.metrics["active"] -= 1
+                job["done"].set()
+
+    def _transcribe(self, request: Dict, pcm: bytes) -> Dict:
+        audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0
+        sample_rate = request.get("sample_rate", config.AUDIO_SAMPLE_RATE)
+        if sample_rate != 16000:
+            n_out = int(len(audio) * 16000 / sample_rate)
+            audio = np.interp(np.linspace(0, len(audio), n_out, endpoint=False),
+                              np.arange(len(audio)), audio).astype(np.float32)
+        duration = len(audio) / 16000
+
+        start = time.perf_counter()
+        segments, _ = self.model.transcribe(audio, language=request.get("language", "en"),
+                                            beam_size=request.get("beam_size", 5))
+        text = " ".join([s.text for s in segments]).strip()
+        elapsed = time.perf_counter() - start
+
+        with self._stats_lock:
+            self.metrics["requests"] += 1
+            self.metrics["audio_seconds"] += duration
+            self.metrics["inference_seconds"] += elapsed
+        return {"text": text, "audio_seconds": duration, "inference_seconds": elapsed,
+                "rtf": elapsed / duration if duration else 0.0}
+
+
+def serve(**kwargs):
+    logging.basicConfig(level=logging.INFO)
+    STTServer(**kwargs).serve_forever()
+
+
+def start_stt_service(timeout: float = 60.0, **kwargs) -> Tuple[mp.Process, Tuple[str, int]]:
+    """Spawn the service as a daemon child; returns it once listening, with its bound address."""
+    ctx = mp.get_context("spawn")
+    ready_recv, ready_send = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=serve, kwargs=dict(kwargs, ready=ready_send), daemon=True, name="STTService")
+    process.start()
+    ready_send.close()
+    try:
+        status = ready_recv.recv() if ready_recv.poll(timeout) else {"error": "start-up timed out"}
+    except EOFError:
+        status = {"error": "exited during start-up"}
+    finally:
+        ready_recv.close()
+    if "error" in status:
+        process.terminate()
+        raise RuntimeError(f"STT service on {kwargs.get('address')}: {status['error']}")
+    logger.info(f"STT service spawned (pid {process.pid}, {status['address']})")
+    return process, status["address"]
+
+
+class STTClient:
+    """
+    Thin, thread-safe client: one persistent connection per session. With a
+    shared REACHY_STT_AUTHKEY it uses (or autostarts) the service on the
+    configured address; without one it runs a private service on a free
+    port with a random key and stops it on close().
+    """
+
+    def __init__(self, address=None, authkey: Optional[bytes] = None, autostart: Optional[bool] = None):
+        self.address = address or config.STT_SERVICE_ADDRESS
+        self.authkey = authkey or config.STT_SERVICE_AUTHKEY
+        self.autostart = config.STT_SERVICE_AUTOSTART if autostart is None else autostart
+        # No shared key: only our own service (spawned with a fresh key) can be trusted
+        self._private = self.authkey is None
+        if self._private:
+            if not self.autostart:
+                raise ValueError("STT client needs REACHY_STT_AUTHKEY or autostart")
+            self.authkey = secrets.token_bytes(32)
+        self.process: Optional[mp.Process] = None
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if not self._private:
+            try:
+                return self._client()
+            except OSError:
+                if not self.autostart: raise
+        if self.process is None or not self.process.is_alive():
+            address = (self.address[0], 0) if self._private else self.address
+            self.process, self.address = start_stt_service(address=address, authkey=self.authkey)
+        return self._client()
+
+    def _client(self):
+        try:
+            return Client(self.address, authkey=self.authkey)
+        except AuthenticationError:
+            raise RuntimeError(f"{self.address} is not an STT service with this REACHY_STT_AUTHKEY") from None
+
+    def _request(self, request: Dict, payload: bytes = b"") -> Dict:
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            try:
+                self._conn.send_bytes(_encode(request, payload))
+                return _decode(self._conn.recv_bytes())[0]
+            except (EOFError, OSError):
+                self._conn = None
+                raise
+
+    def transcribe(self, pcm: np.ndarray, sample_rate: int, language: str = "en",
+                   beam_size: int = 5) -> Dict:
+        """Send int16 PCM, get {'text', 'audio_seconds', 'inference_seconds', 'rtf'}."""
+        result = self._request({"sample_rate": sample_rate, "language": language, "beam_size": beam_size},
+                               np.ascontiguousarray(pcm, dtype=np.int16).tobytes())
+        if "error" in result:
+            raise RuntimeError(f"STT service: {result['error']}")
+        return result
+
+    def stats(self) -> Dict:
+        return self._request({"cmd": "stats"})
+
+    def close(self):
+        """Drop the connection, and stop the service if it is this client's private one."""
+        with self._lock:
+            if self._conn: self._conn.close()
+            self._conn = None
+            if self._private and self.process is not None:
+                self.process.terminate()
+                self.process.join(timeout=2.0)
+                self.process = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local Whisper STT service.")
+    parser.add_argument("--model", default=config.WHISPER_MODEL)
+    parser.add_argument("--workers", type=int, default=config.STT_SERVICE_WORKERS)
+    parser.add_argument("--max-queue", type=int, default=config.STT_SERVICE_MAX_QUEUE)
+    parser.add_argument("--port", type=int, default=config.STT_SERVICE_ADDRESS[1])
+    args = parser.parse_args()
+    if not config.STT_SERVICE_AUTHKEY:
+        parser.error("set REACHY_STT_AUTHKEY to a secret shared with the clients")
+    serve(address=(config.STT_SERVICE_ADDRESS[0], args.port), model=args.model,
+          num_workers=args.workers, max_queue=args.max_queue)
+
+
+if __name__ == "__main__":
+    main()
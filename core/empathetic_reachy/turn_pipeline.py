@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Staged asyncio turn pipeline.
+
+    capture -> stt -> llm -> emotion -> tts -> playback
+                                          \\-> gesture
+
+Stages are connected by bounded queues (a full queue blocks the stage
+feeding it, so slow stages push back instead of piling up work) and each
+runs config.TURN_STAGE_CONCURRENCY workers. Text turns enter at "llm".
+Capture and playback share one audio lock, so the microphone never
+records the robot's own voice and the robot never talks over the user.
+A whole turn can be cancelled at any point. Drives both the Gradio UI and
+the headless runner:
+
+    python -m core.empathetic_reachy.turn_pipeline
+"""
+
+import asyncio
+import itertools
+import logging
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from . import config
+
+logger = logging.getLogger("TurnPipeline")
+
+STAGES = {  # stage -> next stages
+    "capture": ["stt"],
+    "stt": ["llm"],
+    "llm": ["emotion"],
+    "emotion": ["tts"],
+    "tts": ["playback", "gesture"],
+    "playback": [],
+    "gesture": [],
+}
+
+
+class Turn:
+    """One conversational turn; voice turns start without text."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, text: Optional[str] = None):
+        self.id = next(self._ids)
+        self.text = text
+        self.pcm = None
+        self.reply: Optional[Dict] = None  # {'response', 'emotion', 'cues', 'audio'}
+        self.playback: Optional[Tuple[float, float]] = None  # (loop start time, duration)
+        self.error: Optional[str] = None
+        self.cancelled = False
+        self.finished = asyncio.Event()
+        self._playback_started = asyncio.Event()
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._tasks: Set[asyncio.Task] = set()
+        self._branches = 1
+
+    @property
+    def entry_stage(self) -> str:
+        return "llm" if self.text else "capture"
+
+    def cancel(self):
+        """Cancel the turn wherever it is: queued stages skip it, running ones are interrupted."""
+        if self.finished.is_set(): return
+        self.cancelled = True
+        for task in list(self._tasks):
+            task.cancel()
+        self._finish()
+
+    async def wait(self) -> "Turn":
+        await self.finished.wait()
+        return self
+
+    async def updates(self) -> AsyncIterator[str]:
+        """Yield stage names as they complete ("speaking" when audio starts)."""
+        while True:
+            event = await self._events.get()
+            if event is None: return
+            yield event
+
+    def _emit(self, event: str):
+        self._events.put_nowait(event)
+
+    def _finish(self):
+        if self.finished.is_set(): return
+        self._playback_started.set()
+        self.finished.set()
+        self._events.put_nowait(None)
+
+
+class TurnPipeline:
+    def __init__(self, manager, concurrency: Optional[Dict[str, int]] = None,
+                 queue_size: Optional[int] = None):
+        self.manager = manager
+        self.concurrency = dict(config.TURN_STAGE_CONCURRENCY, **(concurrency or {}))
+        if self.concurrency["llm"] != 1:
+            # get_response appends to the shared history around the LLM call
+            logger.warning(f"llm concurrency {self.concurrency['llm']} -> 1 (history is sequential)")
+            self.concurrency["llm"] = 1
+        self.queue_size = queue_size or config.TURN_QUEUE_SIZE
+        self.queues: Dict[str, asyncio.Queue] = {}
+        self.workers: List[asyncio.Task] = []
+        self.turns: Set[Turn] = set()
+        self.audio_lock: Optional[asyncio.Lock] = None  # Held while listening or speaking
+        self._handlers = {
+            "capture": self._capture, "stt": self._stt, "llm": self._llm, "emotion": self._emotion,
+            "tts": self._tts, "playback": self._playback, "gesture": self._gesture,
+        }
+
+    def start(self):
+        """Spawn stage workers on the running loop (done lazily by submit)."""
+        if self.workers: return
+        self.audio_lock = asyncio.Lock()
+        for stage in STAGES:
+            self.queues[stage] = asyncio.Queue(maxsize=self.queue_size)
+            for i in range(self.concurrency[stage]):
+                self.workers.append(asyncio.create_task(self._worker(stage), name=f"{stage}-{i}"))
+        logger.info(f"Pipeline started {self.concurrency}")
+
+    async def stop(self):
+        self.cancel_all()
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers, self.queues = [], {}
+
+    async def submit(self, turn: Turn) -> Turn:
+        """Enqueue a turn; waits while the entry stage's queue is full."""
+        self.start()
+        self.turns.add(turn)
+        await self.queues[turn.entry_stage].put(turn)
+        return turn
+
+    def cancel_all(self):
+        """Cancel every queued or running turn. Not thread-safe: call on the pipeline's loop."""
+        for turn in list(self.turns):
+            turn.cancel()
+
+    async def _worker(self, stage: str):
+        queue = self.queues[stage]
+        while True:
+            turn = await queue.get()
+            try:
+                if turn.cancelled:
+                    continue
+                task = asyncio.create_task(self._handlers[stage](turn))
+                turn._tasks.add(task)
+                try:
+                    proceed = await task
+                except asyncio.CancelledError:
+                    if not turn.cancelled: raise  # Worker itself is stopping
+                    continue
+                except Exception as e:
+                    logger.error(f"Turn {turn.id} {stage}: {e}")
+                    turn.error = str(e)
+                    turn.cancel()
+                    continue
+                finally:
+                    turn._tasks.discard(task)
+                if turn.cancelled:
+                    continue
+                turn._emit(stage)
+                await self._forward(turn, stage if proceed is not False else None)
+            finally:
+                if turn.finished.is_set():
+                    self.turns.discard(turn)
+                queue.task_done()
+
+    async def _forward(self, turn: Turn, stage: Optional[str]):
+        """Pass the turn on to the next stage(s); finish it at the end of its last branch."""
+        next_stages = STAGES[stage] if stage else []
+        turn._branches += len(next_stages) - 1
+        if turn._branches == 0:
+            turn._finish()
+        for next_stage in next_stages:
+            await self.queues[next_stage].put(turn)
+
+    # --- Stages (return False to end the turn early) ---
+
+    async def _capture(self, turn: Turn):
+        async with self.audio_lock:
+            turn.pcm = await self.manager.capture_utterance()
+        if turn.pcm is None:
+            turn.error = "No speech"
+            return False
+
+    async def _stt(self, turn: Turn):
+        turn.text = await asyncio.to_thread(self.manager.transcribe, turn.pcm)
+        if not turn.text:
+            turn.error = "No speech"
+            return False
+        logger.info(f"✅ '{turn.text}'")
+
+    async def _llm(self, turn: Turn):
+        turn.reply = await self.manager.get_response(turn.text)
+
+    async def _emotion(self, turn: Turn):
+        turn.reply = self.manager.annotate_reply(turn.reply)
+
+    async def _tts(self, turn: Turn):
+        if turn.reply["audio"] is None:
+            turn.reply["audio"] = await asyncio.to_thread(self.manager.synthesize_speech, turn.reply["response"])
+
+    async def _playback(self, turn: Turn):
+        def on_start(start, duration):
+            turn.playback = (start, duration)
+            turn._playback_started.set()
+            turn._emit("speaking")
+        try:
+            async with self.audio_lock:
+                await self.manager.speak_response(turn.reply["response"], turn.reply["audio"], on_start=on_start)
+        finally:
+            turn._playback_started.set()
+
+    async def _gesture(self, turn: Turn):
+        await turn._playback_started.wait()
+        if turn.playback and turn.reply["cues"]:
+            await self.manager.dispatch_cues(turn.reply["cues"], *turn.playback)
+
+
+async def run_headless(manager):
+    """Voice-only conversation loop without the UI: listen, reply, repeat."""
+    logger.info("🤖 Headless mode - Ctrl+C to quit")
+    try:
+        while True:
+            turn = await (await manager.pipeline.submit(Turn())).wait()
+            if turn.error:
+                logger.info(f"⏭️ {turn.error}")
+    finally:
+        await manager.pipeline.stop()
+
+
+def main():
+    from reachy_mini import ReachyMini
+    from .conversation_manager import ConversationManager
+
+    logging.basicConfig(level=logging.INFO)
+    config.validate_config()
+    config.print_config()
+    mini = ReachyMini(connection_mode='localhost_only') if config.SIMULATION_MODE else ReachyMini()
+    manager = ConversationManager(mini, config.ANTHROPIC_API_KEY, config.NVIDIA_API_KEY)
+    try:
+        asyncio.run(run_headless(manager))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
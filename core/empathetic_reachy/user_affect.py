@@ -0,0 +1,93 @@
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import numpy as np
+
+from . import config
+
+logger = logging.getLogger("UserAffect")
+
+# FaceMesh indices: inner lips, mouth corners, eye lids/corners (L, R), brow centres
+AFFECT_LANDMARKS = [13, 14, 61, 291, 159, 145, 33, 133, 386, 374, 362, 263, 105, 334]
+# Distance pairs as positions into AFFECT_LANDMARKS
+_PAIR_A = np.array([0, 2, 4, 6, 8, 10, 12, 13, 6])
+_PAIR_B = np.array([1, 3, 5, 7, 9, 11, 4, 8, 11])
+FEATURES = ("mouth_aspect", "eye_openness", "brow_raise", "mouth_width")
+
+
+def affect_features(face_landmarks, img_w: int, img_h: int) -> np.ndarray:
+    """
+    Geometric expression features from landmarks FaceMesh already returned:
+    [mouth aspect, eye openness, brow raise, mouth width], scale-free.
+    """
+    lm = face_landmarks.landmark
+    pts = np.array([(lm[i].x * img_w, lm[i].y * img_h) for i in AFFECT_LANDMARKS])
+    d = np.hypot(*(pts[_PAIR_A] - pts[_PAIR_B]).T)
+    # d: mouth h, mouth w, L eye h, L eye w, R eye h, R eye w, L brow-lid, R brow-lid, interocular
+    return np.array([
+        d[0] / d[1],
+        (d[2] / d[3] + d[4] / d[5]) / 2,
+        (d[6] + d[7]) / (2 * d[8]),
+        d[1] / d[8],
+    ])
+
+
+class UserAffectEstimator:
+    """
+    Smooths per-frame features into a user-affect estimate. The first
+    frames after calibration are the neutral baseline, like head pose;
+    changes are read relative to it (mouth opening as an absolute change).
+    """
+
+    def __init__(self, smoothing: Optional[float] = None, baseline_frames: Optional[int] = None,
+                 max_age: Optional[float] = None):
+        self.smoothing = config.USER_AFFECT_SMOOTHING if smoothing is None else smoothing
+        self.baseline_frames = baseline_frames or config.USER_AFFECT_BASELINE_FRAMES
+        self.max_age = config.USER_AFFECT_MAX_AGE if max_age is None else max_age
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._smoothed: Optional[np.ndarray] = None
+            self._baseline_sum = np.zeros(len(FEATURES))
+            self._baseline_n = 0
+            self.baseline: Optional[np.ndarray] = None
+            self._updated = 0.0
+
+    def update(self, features: np.ndarray):
+        with self._lock:
+            self._updated = time.monotonic()
+            if self.baseline is None:
+                self._baseline_sum += features
+                self._baseline_n += 1
+                if self._baseline_n >= self.baseline_frames:
+                    self.baseline = self._baseline_sum / self._baseline_n
+            if self._smoothed is None:
+                self._smoothed = features.copy()
+            else:
+                self._smoothed += self.smoothing * (features - self._smoothed)
+
+    def estimate(self) -> Dict:
+        """{'emotion', 'confidence', 'features'}; neutral/0.0 until the baseline is set or once the face is stale."""
+        with self._lock:
+            stale = time.monotonic() - self._updated > self.max_age
+            if self.baseline is None or self._smoothed is None or stale:
+                return {"emotion": "neutral", "confidence": 0.0, "features": {}}
+            rel = self._smoothed / np.maximum(self.baseline, 1e-6) - 1.0
+            # Inner lips nearly touch at rest, so mouth opening is an absolute change
+            rel[0] = self._smoothed[0] - self.baseline[0]
+        mouth_open, eyes, brows, width = rel
+        if mouth_open > 0.25 and (brows > 0.08 or eyes > 0.1):
+            emotion, strength = "surprised", max(brows, eyes) / 0.08
+        elif width > 0.06:
+            emotion, strength = "happy", width / 0.06
+        elif width < -0.04 and brows < -0.05:
+            emotion, strength = "sad", min(width / -0.04, brows / -0.05)
+        else:
+            emotion, strength = "neutral", 1.0
+        confidence = float(np.clip(0.4 + 0.2 * strength, 0.0, 0.9)) if emotion != "neutral" else 0.5
+        return {"emotion": emotion, "confidence": confidence,
+                "features": dict(zip(FEATURES, (float(x) for x in rel)))}
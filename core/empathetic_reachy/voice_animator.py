@@ -1,7 +1,10 @@
 import asyncio
+import math
 import numpy as np
 import logging
-from reachy_mini.utils import create_head_pose
+
+from .pose_cache import cached_antennas, cached_head_pose, head_poses
+from .quality_governor import governor
 
 logger = logging.getLogger("VoiceAnimator")
 
@@ -15,37 +18,49 @@ class VoiceAnimator:
     async def animate_speech(self, duration: float):
         """Smooth natural movements."""
         self.is_animating = True
-        start_time = asyncio.get_event_loop().time()
+        loop = asyncio.get_event_loop()
+        start_time = loop.time()
         phase = 0
+        tick = governor.settings("animation")["tick"]
+        poses, antennas = self.trajectory(phase, tick, math.ceil(duration / tick) + 1)
+        i = 0
         
         try:
-            while self.is_animating and (asyncio.get_event_loop().time() - start_time) < duration:
-                t = phase
-                yaw = np.sin(t * 1.0) * 4
-                pitch = np.sin(t * 1.4) * 2
-                roll = np.sin(t * 0.7) * 1.5
-                
-                ant_base = 18
-                ant_l = ant_base + np.sin(t * 1.8) * 12
-                ant_r = ant_base - np.sin(t * 1.8) * 12
-                
+            while self.is_animating and (loop.time() - start_time) < duration:
                 try:
-                    head_pos = create_head_pose(0, 0, 0, roll, pitch, yaw, mm=True, degrees=True)
-                    antennas = np.deg2rad([ant_l, ant_r])
-                    self.mini.goto_target(head_pos, antennas, duration=0.1)
+                    self.mini.goto_target(poses[i], antennas[i], duration=tick)
                 except Exception as e:
                     logger.debug(f"Skip: {e}")
                 
-                phase += 0.18
-                await asyncio.sleep(0.1)
+                # Same motion speed at any tick rate (0.18 rad per 100 ms)
+                phase += 1.8 * tick
+                i += 1
+                wake_at = loop.time() + tick
+                await asyncio.sleep(tick)
+                # How late the event loop woke us (busy loop -> slower ticks)
+                governor.record("animation", max(0.0, loop.time() - wake_at))
+                new_tick = governor.settings("animation")["tick"]
+                if new_tick != tick or i >= len(poses):
+                    tick, i = new_tick, 0
+                    remaining = max(0.0, duration - (loop.time() - start_time))
+                    poses, antennas = self.trajectory(phase, tick, math.ceil(remaining / tick) + 1)
         finally:
             self.stop_animation()
 
+    @staticmethod
+    def trajectory(phase: float, tick: float, steps: int):
+        """Head poses (steps, 4, 4) and antenna targets (steps, 2) for the next ticks, in one pass."""
+        t = phase + 1.8 * tick * np.arange(steps)
+        poses = head_poses(np.sin(t * 0.7) * 1.5, np.sin(t * 1.4) * 2, np.sin(t * 1.0) * 4)
+        ant_base = 18
+        swing = np.sin(t * 1.8) * 12
+        antennas = np.deg2rad(np.stack([ant_base + swing, ant_base - swing], axis=1))
+        return poses, antennas
+
     def stop_animation(self):
         """Reset."""
         self.is_animating = False
         try:
-            head_pos = create_head_pose(0, 0, 0, 0, 0, 0, mm=True, degrees=True)
-            self.mini.goto_target(head_pos, np.deg2rad([0, 0]), duration=0.3)
+            self.mini.goto_target(cached_head_pose(0, 0, 0), cached_antennas(0, 0), duration=0.3)
         except Exception as e:
             logger.debug(f"Reset skip: {e}")
\ No newline at end of file
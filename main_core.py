@@ -1,18 +1,19 @@
-import gradio as gr
-import asyncio
+import base64
 import logging
 import time
 import threading
 import cv2
-import numpy as np
-from reachy_mini import ReachyMini
 from core.empathetic_reachy import config
-from core.empathetic_reachy.conversation_manager import ConversationManager
-from core.empathetic_reachy.head_mirroring import HeadMirroringController
+from core.empathetic_reachy.turn_pipeline import Turn
+
+# Gradio, ReachyMini, Whisper and MediaPipe are imported where they are used:
+# spawned worker processes re-run this module's top level as __mp_main__
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ReachyUI")
 
+PREVIEW_PLACEHOLDER = '<div style="height:300px;background:#000;border-radius:8px"></div>'
+
 class ReachyOracle:
     def __init__(self):
         self.mini = None
@@ -21,14 +22,22 @@ class ReachyOracle:
         self.sim_status = "🔴 Disconnected"
         self.is_mirroring = False
         self.current_frame = None
+        self.frame_seq = 0
+        self.frame_cond = threading.Condition()
         self.mirror_thread = None
 
     def initialize_robot(self):
+        from reachy_mini import ReachyMini
+        from core.empathetic_reachy.conversation_manager import ConversationManager
+        from core.empathetic_reachy.head_mirroring import HeadMirroringController
         try:
             logger.info("Connecting...")
+            if self.manager:
+                self.manager.close()  # Reconnect: don't leave the old session's STT service running
             self.mini = ReachyMini(connection_mode='localhost_only') if config.SIMULATION_MODE else ReachyMini()
             self.manager = ConversationManager(self.mini, config.ANTHROPIC_API_KEY, config.NVIDIA_API_KEY)
             self.mirror_controller = HeadMirroringController(self.mini)
+            self.manager.user_affect = self.mirror_controller.user_affect
             self.sim_status = "🟢 Connected (Sim)" if config.SIMULATION_MODE else "🟢 Connected"
             return self.sim_status
         except Exception as e:
@@ -47,39 +56,47 @@ class ReachyOracle:
         history.append({"role": "user", "content": user_input})
         history.append({"role": "assistant", "content": "🤔..."})
         yield history, "🤔 Thinking", "neutral"
-        
-        self.manager.history.append({"role": "user", "content": user_input})
-        try:
-            response = await self.manager.get_claude_response(user_input)
-            self.manager.history.append({"role": "assistant", "content": response})
-            emotion = self.manager.emotion_analyzer.analyze(response)
-            
-            history[-1] = {"role": "assistant", "content": response}
-            yield history, f"🎭 {emotion}", emotion
-            
-            await asyncio.to_thread(self.manager.gesture_controller.perform_gesture, emotion)
-            yield history, "🗣️ Speaking", emotion
-            await self.manager.speak_response(response)
-            yield history, "✅ Ready", emotion
-        except Exception as e:
-            logger.error(f"Error: {e}")
-            history[-1] = {"role": "assistant", "content": f"❌ {str(e)}"}
-            yield history, "🔴 Error", "sad"
+        turn = await self.manager.pipeline.submit(Turn(user_input))
+        async for update in self._follow_turn(turn, history):
+            yield update
 
     async def voice_interaction(self, history):
         if not self.manager:
             yield history, "❌ Not connected", "neutral"
             return
         yield history, "🎤 Listening...", "neutral"
-        user_text = await self.manager.listen_to_user()
-        if not user_text:
+        turn = await self.manager.pipeline.submit(Turn())
+        async for update in self._follow_turn(turn, history):
+            yield update
+
+    async def _follow_turn(self, turn, history):
+        """Translate pipeline stage updates into chat/status/emotion UI updates."""
+        emotion, has_placeholder = "neutral", turn.text is not None
+        async for stage in turn.updates():
+            if stage == "capture":
+                yield history, "📝 Transcribing", emotion
+            elif stage == "stt":
+                has_placeholder = True
+                history.append({"role": "user", "content": turn.text})
+                history.append({"role": "assistant", "content": "🤔..."})
+                yield history, "🤔 Processing", emotion
+            elif stage == "emotion":
+                emotion = turn.reply["emotion"]
+                history[-1] = {"role": "assistant", "content": turn.reply["response"]}
+                yield history, f"🎭 {emotion}", emotion
+            elif stage == "speaking":
+                yield history, "🗣️ Speaking", emotion
+        if turn.error == "No speech":
             yield history, "❌ No speech", "neutral"
-            return
-        history.append({"role": "user", "content": user_text})
-        history.append({"role": "assistant", "content": "🤔..."})
-        yield history, "🤔 Processing", "neutral"
-        async for h, s, e in self.chat_interaction(user_text, history[:-2]):
-            yield h, s, e
+        elif turn.error:
+            logger.error(f"Error: {turn.error}")
+            if has_placeholder:
+                history[-1] = {"role": "assistant", "content": f"❌ {turn.error}"}
+            yield history, "🔴 Error", "sad"
+        elif turn.cancelled:
+            yield history, "⏹️ Cancelled", emotion
+        else:
+            yield history, "✅ Ready", emotion
 
     def perform_quick_gesture(self, emotion):
         if self.manager:
@@ -92,61 +109,74 @@ class ReachyOracle:
                 return f"❌ {e}"
         return "⚠️ Not connected"
 
-    def clear_memory(self):
+    async def clear_memory(self):
+        # Async so Gradio runs it on the event loop that owns the pipeline's turns
         if self.manager: self.manager.clear_history()
         return [], "🧹 Cleared"
 
     def _mirror_loop(self):
+        try:
+            self._run_mirror()
+        except Exception as e:
+            logger.error(f"Mirror loop: {e}")
+        finally:
+            # Always wake stream_preview, whatever ended the loop
+            with self.frame_cond:
+                self.is_mirroring = False
+                self.frame_cond.notify_all()
+
+    def _run_mirror(self):
         if not self.mirror_controller: return
         cap = cv2.VideoCapture(0)
         if not cap.isOpened():
-            self.is_mirroring = False
             return
         
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 480)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 360)
         cap.set(cv2.CAP_PROP_FPS, 30)
+        self.mirror_controller.camera_size = None
         logger.info("Webcam started")
+        try:
+            self._capture_frames(cap)
+        finally:
+            cap.release()
+            self.mirror_controller.release()
+
+    def _capture_frames(self, cap):
         frame_count = 0
-        
         while self.is_mirroring and cap.isOpened():
+            settings = self.mirror_controller.configure_camera(cap)
             frame_count += 1
             ret, frame = cap.read()
             if not ret:
                 time.sleep(0.01)
                 continue
             
-            if frame_count % 2 != 0:
+            if frame_count % settings["inference_every"] != 0:
                 time.sleep(0.005)
                 continue
             
             image = cv2.flip(frame, 1)
-            img_h, img_w = image.shape[:2]
             image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            results = self.mirror_controller.face_mesh.process(image_rgb)
             
-            if results.multi_face_landmarks:
-                face = results.multi_face_landmarks[0]
-                pose = self.mirror_controller.calculate_head_pose(face, img_w, img_h)
-                if not self.mirror_controller.calibrated:
-                    self.mirror_controller.pitch_offset = pose['pitch']
-                    self.mirror_controller.yaw_offset = pose['yaw']
-                    self.mirror_controller.roll_offset = pose['roll']
-                    self.mirror_controller.calibrated = True
-                self.mirror_controller.mirror_to_reachy(pose)
+            if self.mirror_controller.process_frame(image_rgb):
                 cv2.putText(image, "✓", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
             else:
                 cv2.putText(image, "✗", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 2)
             
-            self.current_frame = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-            time.sleep(0.015)
-        
-        cap.release()
-        self.is_mirroring = False
+            with self.frame_cond:
+                self.current_frame = image
+                self.frame_seq += 1
+                self.frame_cond.notify_all()
+            time.sleep(0.015 * settings["sleep_scale"])
 
     def start_mirroring(self):
-        if self.is_mirroring: return "⚠️ Already on"
-        if not self.mirror_controller: return "❌ Connect first"
+        import gradio as gr
+        # Raising (not returning a status) keeps .success() from opening another preview stream
+        if self.is_mirroring: raise gr.Error("⚠️ Already on")
+        if not self.mirror_controller: raise gr.Error("❌ Connect first")
+        if self.mirror_thread and self.mirror_thread.is_alive():
+            # A stopped loop still finishing its frame would release the new session's worker
+            self.mirror_thread.join(timeout=5.0)
+            if self.mirror_thread.is_alive(): raise gr.Error("⏳ Still stopping, try again")
         self.is_mirroring = True
         self.mirror_controller.calibrated = False
         self.mirror_thread = threading.Thread(target=self._mirror_loop, daemon=True)
@@ -154,14 +184,40 @@ class ReachyOracle:
         return "▶️ Started"
 
     def stop_mirroring(self):
-        self.is_mirroring = False
-        self.current_frame = None
+        with self.frame_cond:
+            self.is_mirroring = False
+            self.current_frame = None
+            self.frame_cond.notify_all()
+        if self.mirror_controller:
+            self.mirror_controller.user_affect.reset()
         return "⏹️ Stopped"
 
-    def get_current_frame(self):
-        return self.current_frame if self.current_frame is not None else np.zeros((360, 480, 3), dtype=np.uint8)
+    def stream_preview(self):
+        """
+        Push a JPEG only when a new frame exists, at most PREVIEW_MAX_FPS
+        (Gradio gives generators no client backpressure, so that cap is the
+        sustainable-rate knob). Idle = nothing sent.
+        """
+        last_seq, min_interval = -1, 1.0 / config.PREVIEW_MAX_FPS
+        while self.is_mirroring:
+            with self.frame_cond:
+                self.frame_cond.wait_for(lambda: self.frame_seq != last_seq or not self.is_mirroring, timeout=1.0)
+                frame, seq = self.current_frame, self.frame_seq
+            if frame is None or seq == last_seq:
+                continue
+            last_seq, sent = seq, time.monotonic()
+            yield self._encode_preview(frame)
+            # Fixed cap: frames arriving meanwhile are skipped, not queued
+            time.sleep(max(0.0, min_interval - (time.monotonic() - sent)))
+        yield PREVIEW_PLACEHOLDER
 
-oracle = ReachyOracle()
+    def _encode_preview(self, frame):
+        h, w = frame.shape[:2]
+        if w > config.PREVIEW_WIDTH:
+            frame = cv2.resize(frame, (config.PREVIEW_WIDTH, h * config.PREVIEW_WIDTH // w),
+                               interpolation=cv2.INTER_AREA)
+        _, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, config.PREVIEW_JPEG_QUALITY])
+        return f'<img src="data:image/jpeg;base64,{base64.b64encode(jpeg).decode()}" style="width:100%"/>'
 
 # PERFECT CSS
 css = """
@@ -190,71 +246,74 @@ css = """
 }
 """
 
-with gr.Blocks(title="Reachy Mini AI") as demo:
-    gr.HTML('<div class="main-title">🤖 Empathetic Reachy Mini</div>')
-    gr.HTML('<div class="subtitle">AI-Powered Robot with Voice, Emotion & Gestures</div>')
-    
-    # CONNECTION
-    with gr.Row():
-        status_box = gr.Textbox(value="🔴 Disconnected", label="Status", scale=3, interactive=False)
-        connect_btn = gr.Button("🔌 Connect", variant="primary", scale=1, elem_classes="big-button")
-    
-    # MAIN LAYOUT
-    with gr.Row(equal_height=True):
-        # LEFT: Vision & Gestures
-        with gr.Column(scale=1):
-            gr.Markdown("### 📷 Live Vision")
-            camera_view = gr.Image(label="Webcam", height=300)
-            
-            with gr.Row():
-                mirror_btn = gr.Button("▶️ Start Mirror", variant="primary", elem_classes="big-button")
-                stop_btn = gr.Button("⏹️ Stop", variant="stop", elem_classes="big-button")
-            
-            mirror_status = gr.Textbox(value="⏸️ Not mirroring", label="Mirror Status")
-            emotion_display = gr.Label(label="🎭 Emotion", value="neutral")
-            
-            gr.Markdown("### 🎨 Quick Gestures")
-            with gr.Row():
-                gr.Button("😊", elem_classes="gesture-btn").click(
-                    fn=lambda: oracle.perform_quick_gesture("happy"), outputs=gr.Textbox(visible=False))
-                gr.Button("😢", elem_classes="gesture-btn").click(
-                    fn=lambda: oracle.perform_quick_gesture("sad"), outputs=gr.Textbox(visible=False))
-                gr.Button("🤔", elem_classes="gesture-btn").click(
-                    fn=lambda: oracle.perform_quick_gesture("thinking"), outputs=gr.Textbox(visible=False))
-        
-        # RIGHT: Chat
-        with gr.Column(scale=2):
-            gr.Markdown("### 💬 Conversation")
-            chatbot = gr.Chatbot(height=500)
-            msg_box = gr.Textbox(label="Message", placeholder="Type or click Voice...", lines=2)
-            
-            with gr.Row():
-                send_btn = gr.Button("📨 Send", variant="primary", scale=2, elem_classes="big-button")
-                voice_btn = gr.Button("🎤 Voice", variant="secondary", scale=2, elem_classes="big-button")
-                clear_btn = gr.Button("🗑️", variant="stop", scale=1)
-    
-    status_indicator = gr.Textbox(label="Action", value="💤 Idle")
-    
-    gr.Markdown("---")
-    gr.Markdown("**Features:** Speech-to-Speech • Real-time Emotion Detection • Head Mirroring • Natural Gestures")
-    
-    # TIMER
-    timer = gr.Timer(0.15)
-    timer.tick(fn=oracle.get_current_frame, outputs=camera_view)
-    
-    # EVENTS
-    connect_btn.click(fn=oracle.initialize_robot, outputs=status_box)
-    mirror_btn.click(fn=oracle.start_mirroring, outputs=mirror_status)
-    stop_btn.click(fn=oracle.stop_mirroring, outputs=mirror_status)
-    msg_box.submit(fn=oracle.chat_interaction, inputs=[msg_box, chatbot], 
-                   outputs=[chatbot, status_indicator, emotion_display]).then(lambda: "", None, msg_box)
-    send_btn.click(fn=oracle.chat_interaction, inputs=[msg_box, chatbot], 
-                   outputs=[chatbot, status_indicator, emotion_display]).then(lambda: "", None, msg_box)
-    voice_btn.click(fn=oracle.voice_interaction, inputs=[chatbot], 
-                    outputs=[chatbot, status_indicator, emotion_display])
-    clear_btn.click(fn=oracle.clear_memory, outputs=[chatbot, status_indicator])
+def build_ui(oracle):
+    import gradio as gr
+
+    with gr.Blocks(title="Reachy Mini AI") as demo:
+        gr.HTML('<div class="main-title">🤖 Empathetic Reachy Mini</div>')
+        gr.HTML('<div class="subtitle">AI-Powered Robot with Voice, Emotion & Gestures</div>')
+
+        # CONNECTION
+        with gr.Row():
+            status_box = gr.Textbox(value="🔴 Disconnected", label="Status", scale=3, interactive=False)
+            connect_btn = gr.Button("🔌 Connect", variant="primary", scale=1, elem_classes="big-button")
+
+        # MAIN LAYOUT
+        with gr.Row(equal_height=True):
+            # LEFT: Vision & Gestures
+            with gr.Column(scale=1):
+                gr.Markdown("### 📷 Live Vision")
+                camera_view = gr.HTML(value=PREVIEW_PLACEHOLDER, label="Webcam")
+
+                with gr.Row():
+                    mirror_btn = gr.Button("▶️ Start Mirror", variant="primary", elem_classes="big-button")
+                    stop_btn = gr.Button("⏹️ Stop", variant="stop", elem_classes="big-button")
+
+                mirror_status = gr.Textbox(value="⏸️ Not mirroring", label="Mirror Status")
+                emotion_display = gr.Label(label="🎭 Emotion", value="neutral")
+
+                gr.Markdown("### 🎨 Quick Gestures")
+                with gr.Row():
+                    gr.Button("😊", elem_classes="gesture-btn").click(
+                        fn=lambda: oracle.perform_quick_gesture("happy"), outputs=gr.Textbox(visible=False))
+                    gr.Button("😢", elem_classes="gesture-btn").click(
+                        fn=lambda: oracle.perform_quick_gesture("sad"), outputs=gr.Textbox(visible=False))
+                    gr.Button("🤔", elem_classes="gesture-btn").click(
+                        fn=lambda: oracle.perform_quick_gesture("thinking"), outputs=gr.Textbox(visible=False))
+
+            # RIGHT: Chat
+            with gr.Column(scale=2):
+                gr.Markdown("### 💬 Conversation")
+                chatbot = gr.Chatbot(height=500)
+                msg_box = gr.Textbox(label="Message", placeholder="Type or click Voice...", lines=2)
+
+                with gr.Row():
+                    send_btn = gr.Button("📨 Send", variant="primary", scale=2, elem_classes="big-button")
+                    voice_btn = gr.Button("🎤 Voice", variant="secondary", scale=2, elem_classes="big-button")
+                    clear_btn = gr.Button("🗑️", variant="stop", scale=1)
+
+        status_indicator = gr.Textbox(label="Action", value="💤 Idle")
+
+        gr.Markdown("---")
+        gr.Markdown("**Features:** Speech-to-Speech • Real-time Emotion Detection • Head Mirroring • Natural Gestures")
+
+        # EVENTS
+        connect_btn.click(fn=oracle.initialize_robot, outputs=status_box)
+        mirror_btn.click(fn=oracle.start_mirroring, outputs=mirror_status).success(
+            fn=oracle.stream_preview, outputs=camera_view)
+        stop_btn.click(fn=oracle.stop_mirroring, outputs=mirror_status)
+        msg_box.submit(fn=oracle.chat_interaction, inputs=[msg_box, chatbot], 
+                       outputs=[chatbot, status_indicator, emotion_display]).then(lambda: "", None, msg_box)
+        send_btn.click(fn=oracle.chat_interaction, inputs=[msg_box, chatbot], 
+                       outputs=[chatbot, status_indicator, emotion_display]).then(lambda: "", None, msg_box)
+        voice_btn.click(fn=oracle.voice_interaction, inputs=[chatbot], 
+                        outputs=[chatbot, status_indicator, emotion_display])
+        clear_btn.click(fn=oracle.clear_memory, outputs=[chatbot, status_indicator])
+    return demo
 
 if __name__ == "__main__":
+    import gradio as gr
     config.validate_config()
     config.print_config()
+    demo = build_ui(ReachyOracle())
     demo.queue().launch(share=False, theme=gr.themes.Soft(primary_hue="purple"), css=css)
\ No newline at end of file